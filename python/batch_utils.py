@@ -0,0 +1,36 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def extract_batch(extract_one, pdf_paths, workers=None):
+    """
+    Run extract_one over several PDFs in worker processes, results in input order.
+
+    extract_one must be a module-level function (or a functools.partial of one)
+    so it pickles. Processes rather than threads: pdfminer's layout analysis is
+    pure Python and holds the GIL.
+    """
+    pdf_paths = list(pdf_paths)
+    if not pdf_paths:
+        return []
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker amortizes the IPC without unbalancing the pool
+    chunksize = max(1, len(pdf_paths) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(extract_one, pdf_paths, chunksize=chunksize))
+
+
+def print_result(data, json_flag):
+    """
+    Print one extraction result: a single JSON line with --json, indented JSON otherwise.
+    """
+    if 'error' in data:
+        if json_flag:
+            print(json.dumps(data))
+        else:
+            print(f"Error: {data['error']}")
+    elif json_flag:
+        print(json.dumps(data, ensure_ascii=True))
+    else:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
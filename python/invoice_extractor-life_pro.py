@@ -57,20 +57,16 @@ def parse_life_pro_invoice_text(text: str):
     """Parse Life pro invoice text with specialized logic for their format"""
     print(f"DEBUG: parse_life_pro_invoice_text called, text length: {len(text)}", file=sys.stderr)
     
+    # Every section is created up front (vendor is always Life Pro for this
+    # parser), so callers never need to patch missing keys afterwards
     invoice_data = {
-        'vendor': {},
+        'vendor': {'name': 'Life Pro'},
         'customer': {},
         'order_items': [],
         'totals': {},
         'metadata': {}
     }
 
-    print(f"DEBUG: Starting vendor extraction...", file=sys.stderr)
-    # Extract vendor information
-    vendor_match = re.search(r'(LIFE PRO|Life Pro)', text, re.IGNORECASE)
-    if vendor_match:
-        invoice_data['vendor']['name'] = 'Life Pro'
-
     # Extract customer information - look for company name patterns
     customer_match = re.search(r'(FITNESS WORLD NUTRITION|FWN)', text, re.IGNORECASE)
     if customer_match:
@@ -197,6 +193,9 @@ def parse_life_pro_invoice_text(text: str):
             print(f"DEBUG: parse_number error converting '{s}' to float", file=sys.stderr)
             return 0.0
 
+    # Running sum of item totals, kept in step with order_items as they are added/merged
+    calculated_subtotal = 0.0
+
     # Add safety counter to prevent infinite loops
     iterations = 0
     max_iterations = len(lines) * 2  # Allow up to 2x the number of lines as iterations
@@ -418,6 +417,7 @@ def parse_life_pro_invoice_text(text: str):
                                     'unit_price': f"{unit_price:.2f}",
                                     'total': f"{final_total:.2f}"
                                 })
+                                calculated_subtotal += final_total
                                 # Debug: Print each item found
                                 if discount_quantity > 0 or discount_total > 0:
                                     print(f"DEBUG: Found item with discount - Ref: {reference}, Qty: {quantity}->{final_quantity}, Total: {total}->{final_total}", file=sys.stderr)
@@ -435,6 +435,7 @@ def parse_life_pro_invoice_text(text: str):
                                         
                                         item['quantity'] = str(new_qty)
                                         item['total'] = f"{new_total:.2f}"
+                                        calculated_subtotal += final_total
                                         
                                         print(f"DEBUG: Merged duplicate item - Ref: {reference}, Qty: {existing_qty}+{final_quantity}={new_qty}, Total: {existing_total}+{final_total}={new_total:.2f}", file=sys.stderr)
                                         break
@@ -489,15 +490,9 @@ def parse_life_pro_invoice_text(text: str):
     except Exception as e:
         print(f"DEBUG: Error searching for total: {e}", file=sys.stderr)
     
-    # Calculate totals from line items as fallback/validation
-    print(f"DEBUG: Calculating totals from {len(invoice_data['order_items'])} items...", file=sys.stderr)
-    calculated_subtotal = 0.0
+    # Totals from line items (accumulated during parsing) as fallback/validation
     if invoice_data['order_items']:
-        try:
-            calculated_subtotal = sum(float(item['total']) for item in invoice_data['order_items'])
-            print(f"DEBUG: Calculated subtotal from items: {calculated_subtotal:.2f}", file=sys.stderr)
-        except Exception as e:
-            print(f"DEBUG: Error calculating subtotal: {e}", file=sys.stderr)
+        print(f"DEBUG: Calculated subtotal from items: {calculated_subtotal:.2f}", file=sys.stderr)
     
     # Determine final totals with priority logic
     print(f"DEBUG: Determining final totals...", file=sys.stderr)
@@ -570,31 +565,6 @@ if __name__ == "__main__":
         
         # Ensure clean output for JSON mode
         if json_flag:
-            # Clean the data to ensure valid JSON
-            if data.get('order_items'):
-                # Ensure all required fields are present and clean
-                for item in data['order_items']:
-                    if 'reference' not in item or not item['reference']:
-                        item['reference'] = f"ITEM_{len(data['order_items'])}"
-                    if 'description' not in item:
-                        item['description'] = ""
-                    if 'quantity' not in item:
-                        item['quantity'] = "0"
-                    if 'unit_price' not in item:
-                        item['unit_price'] = "0.00"
-                    if 'total' not in item:
-                        item['total'] = "0.00"
-            
-            # Ensure vendor name is set
-            if not data.get('vendor') or not data['vendor'].get('name'):
-                data['vendor'] = {'name': 'Life Pro'}
-            
-            # Ensure totals are present
-            if not data.get('totals'):
-                data['totals'] = {}
-            if not data.get('metadata'):
-                data['metadata'] = {}
-            
             # CRITICAL: Validate that we have items before returning success
             if not data.get('order_items') or len(data['order_items']) == 0:
                 error_msg = "No invoice items found in PDF. The invoice may be in an unsupported format or corrupted."
@@ -5,6 +5,13 @@ import sys
 import json
 
 MAX_REALISTIC_QTY = 500  # Some Max Protein orders exceed 100 units
+NUMERIC_COLUMNS = frozenset(('quantity', 'unit_price', 'total'))
+_NUM_RE = re.compile(r'\d+[.,]\d{2}|\d+')
+
+
+def _has_digit(text):
+    """Cheap screen so description-only cells never reach the number regex"""
+    return any(ch in '0123456789' for ch in text)
 
 
 def extract_invoice_data(pdf_path):
@@ -218,6 +225,8 @@ def extract_item_structured(sku_elem, rows, columns, column_types, parse_number)
             continue
         
         col_type = column_types.get(col_idx)
+        if col_type not in NUMERIC_COLUMNS or not _has_digit(elem['text']):
+            continue
         
         # Assign to appropriate field based on column type
         if col_type == 'quantity' and quantity is None:
@@ -229,7 +238,7 @@ def extract_item_structured(sku_elem, rows, columns, column_types, parse_number)
         elif col_type == 'unit_price' and unit_price is None:
             # Unit price column: may have "8.70 10.00" (price + discount %)
             # Extract individual numbers and take first non-round decimal
-            numbers = re.findall(r'\d+[.,]\d{2}|\d+', elem['text'])
+            numbers = _NUM_RE.findall(elem['text'])
             for num_str in numbers:
                 val = parse_number(num_str)
                 if val > 0:
@@ -307,7 +316,9 @@ def try_multirow_extraction(base_y, rows, columns, column_types, parse_number):
                 continue
             
             col_type = column_types.get(col_idx)
-            numbers = re.findall(r'\d+[.,]\d{2}|\d+', elem['text'])
+            if col_type not in NUMERIC_COLUMNS or not _has_digit(elem['text']):
+                continue
+            numbers = _NUM_RE.findall(elem['text'])
             
             if col_type == 'quantity' and quantity is None and numbers:
                 quantity = parse_number(numbers[0])
@@ -6,6 +6,42 @@ from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.converter import PDFPageAggregator
 
+# One alternation per header field; the group name is the output key
+_HEADER_RE = re.compile(
+    r'Invoice Number: ?(?P<invoice_number>\d+)'
+    r'|Reference Number: (?P<reference_number>\w+)'
+    r'|Customer Number: (?P<customer_number>\d+)'
+    r'|Invoice Date: ?(?P<invoice_date>[\d.]+)'
+    r'|Order date: (?P<order_date>[\d.]+)'
+    r'|Subtotal \(exclusive VAT\): ?(?P<subtotal>[\d.,]+) €'
+    r'|Order total \(incl. VAT\): ?(?P<total_amount>[\d.,]+) €'
+    r'|Shipping Costs \(excl. VAT\): (?P<shipping_cost>[\d.,]+) €'
+)
+_HEADER_FIELD_COUNT = _HEADER_RE.groups
+_DECIMAL_HEADER_FIELDS = frozenset(('subtotal', 'total_amount', 'shipping_cost'))
+_DECIMAL_RESULT_FIELDS = _DECIMAL_HEADER_FIELDS | {'calculated_subtotal', 'calculated_total'}
+_DECIMAL_ITEM_FIELDS = ('unit_price', 'total')
+
+
+def _to_decimal(text):
+    """Decimal from an amount like '1,234.56 €' (trailing ' €' and thousands commas dropped)"""
+    return Decimal(text.replace(' €', '').replace(',', ''))
+
+
+def _dec_to_str(value):
+    return format(value, 'f')
+
+
+def to_serializable(result):
+    """Stringify the known Decimal fields in place so json.dumps needs no default hook"""
+    for field in _DECIMAL_RESULT_FIELDS.intersection(result):
+        result[field] = _dec_to_str(result[field])
+    for item in result.get('line_items', ()):
+        for field in _DECIMAL_ITEM_FIELDS:
+            item[field] = _dec_to_str(item[field])
+    return result
+
+
 class NakosportInvoiceParser:
     def __init__(self):
         self.supplier_name = "Nakosport"
@@ -59,9 +95,8 @@ class NakosportInvoiceParser:
                         if len(row) >= 5:
                             print(f"Potential table row: {row}")
             # Now process all_rows for header and line items
-            line_items = self._extract_line_items(all_rows)
+            line_items, calculated_subtotal = self._extract_line_items(all_rows)
             header_info = self._extract_header_info(all_rows)
-            calculated_subtotal = sum(item['total'] for item in line_items)
             calculated_total = calculated_subtotal + header_info.get('shipping_cost', Decimal(0))
             # Build result
             result = {
@@ -81,45 +116,25 @@ class NakosportInvoiceParser:
             return {'error': f"Extraction failed: {str(e)}"}
 
     def _extract_header_info(self, rows):
+        """Scan rows top-down and stop as soon as every header field is found"""
         header = {}
-        full_text = '\n'.join(' '.join(row) for row in rows)
-        print("Full text for header extraction:\n", full_text)
-        # Invoice Number
-        match = re.search(r'Invoice Number: ?(\d+)', full_text)
-        if match:
-            header['invoice_number'] = match.group(1)
-        # Reference Number
-        match = re.search(r'Reference Number: (\w+)', full_text)
-        if match:
-            header['reference_number'] = match.group(1)
-        # Customer Number
-        match = re.search(r'Customer Number: (\d+)', full_text)
-        if match:
-            header['customer_number'] = match.group(1)
-        # Invoice Date
-        match = re.search(r'Invoice Date: ?([\d.]+)', full_text)
-        if match:
-            header['invoice_date'] = match.group(1)
-        # Order Date
-        match = re.search(r'Order date: ([\d.]+)', full_text)
-        if match:
-            header['order_date'] = match.group(1)
-        # Subtotal
-        match = re.search(r'Subtotal \(exclusive VAT\): ?([\d.,]+) €', full_text)
-        if match:
-            header['subtotal'] = Decimal(match.group(1).replace(',', ''))
-        # Total
-        match = re.search(r'Order total \(incl. VAT\): ?([\d.,]+) €', full_text)
-        if match:
-            header['total_amount'] = Decimal(match.group(1).replace(',', ''))
-        # Shipping Cost
-        match = re.search(r'Shipping Costs \(excl. VAT\): ([\d.,]+) €', full_text)
-        if match:
-            header['shipping_cost'] = Decimal(match.group(1).replace(',', ''))
+        for row in rows:
+            for match in _HEADER_RE.finditer(' '.join(row)):
+                field = match.lastgroup
+                if field in header:
+                    continue
+                value = match.group(field)
+                if field in _DECIMAL_HEADER_FIELDS:
+                    value = _to_decimal(value)
+                header[field] = value
+            if len(header) == _HEADER_FIELD_COUNT:
+                break
         return header
 
     def _extract_line_items(self, rows):
+        """Return the parsed items together with the running sum of their totals"""
         line_items = []
+        subtotal = Decimal(0)
         in_table = False
         for row in rows:
             if len(row) >= 7 and 'Brand' in row and 'Product' in row and 'Flavour' in row and 'Price' in row and 'Quantity' in row and 'VAT' in row and 'Sum (ex.)' in row:
@@ -133,12 +148,13 @@ class NakosportInvoiceParser:
                         'brand': row[0],
                         'description': row[1],
                         'flavour': row[2],
-                        'unit_price': Decimal(row[3].replace(' €', '').replace(',', '')),
+                        'unit_price': _to_decimal(row[3]),
                         'quantity': int(row[4]),
                         'vat': int(row[5].replace(' %', '')),
-                        'total': Decimal(row[6].replace(' €', '').replace(',', ''))
+                        'total': _to_decimal(row[6])
                     }
                     line_items.append(item)
+                    subtotal += item['total']
                 except Exception as e:
                     print(f"Failed to parse row: {row} - Error: {str(e)}")
             elif in_table and len(row) == 2 and row[0] == 'FID:':
@@ -147,14 +163,14 @@ class NakosportInvoiceParser:
             elif in_table and len(row) == 1 and row[0].startswith('FID:'):
                 if line_items:
                     line_items[-1]['sku'] = row[0].split(':')[1].strip()
-        return line_items
+        return line_items, subtotal
 
     def _validate_extraction(self, data):
         """Comprehensive validation"""
         errors = []
         # Check mathematical consistency
         if 'line_items' in data and 'subtotal' in data:
-            calculated = sum(Decimal(str(item.get('total', 0))) for item in data['line_items'])
+            calculated = data['calculated_subtotal']
             declared = data['subtotal']
             if abs(calculated - declared) > Decimal('0.01'):
                 errors.append(f"Subtotal mismatch: calculated {calculated} vs declared {declared}")
@@ -176,4 +192,4 @@ if __name__ == "__main__":
     import sys
     parser = NakosportInvoiceParser()
     result = parser.extract(sys.argv[1])
-    print(json.dumps(result, indent=2, default=str))
\ No newline at end of file
+    print(json.dumps(to_serializable(result), indent=2))
\ No newline at end of file
@@ -1,13 +1,88 @@
-import re
 import json
 import io
+import logging
+import mmap
+import os
 import re
-import xml.etree.ElementTree as ET
 from decimal import Decimal
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+# lxml's C parser is much faster on large Factur-X payloads; the stdlib
+# ElementTree exposes the same find()/iterparse() API and is kept as fallback.
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# IssueDateTime in format 102 (YYYYMMDD)
+_DATE8_RE = re.compile(r"^\d{8}$")
+
+
+@lru_cache(maxsize=None)
+def _vat_factor(rate_text: str) -> float:
+    """HT -> TTC multiplier for a RateApplicablePercent value (few distinct rates per invoice)."""
+    return 1 + float(rate_text) / 100
+
 
-from pdfminer.high_level import extract_text_to_fp, extract_text
-from pdfminer.layout import LAParams
+# The attachment is located with two literal byte searches (much cheaper than
+# a non-greedy regex over the whole binary PDF)
+_XML_START = b"<rsm:CrossIndustryInvoice"
+_XML_END = b"</rsm:CrossIndustryInvoice>"
+
+
+@lru_cache(maxsize=128)
+def _load_xml_cached(path: str, mtime_ns: int, size: int) -> Optional[bytes]:
+    """Embedded Factur-X XML bytes of ``path``, keyed on its modification time and size.
+
+    Only in-process reuse hits this cache (tests, or a caller extracting the
+    same file twice); the CLI runs once per PDF and never does. The cached
+    value is immutable bytes, safe to share between threads; every caller
+    parses its own element tree from it.
+    """
+    # Search a read-only memory map rather than reading the whole PDF into
+    # memory; only the XML slice between the markers is copied out.
+    with open(path, "rb") as fp:
+        try:
+            pdf_map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file cannot be mapped
+            return None
+        with pdf_map:
+            start = pdf_map.find(_XML_START)
+            if start == -1:
+                return None
+            end = pdf_map.find(_XML_END, start + len(_XML_START) + 1)
+            if end == -1:
+                return None
+            return pdf_map[start:end + len(_XML_END)]
+
+
+def _build_path_tree(paths: Dict[str, str]) -> Dict[str, Any]:
+    """Turn {field: "a/b/c"} element paths into a nested {a: {b: {c: field}}} lookup."""
+    tree: Dict[str, Any] = {}
+    for field, path in paths.items():
+        node = tree
+        *parents, leaf = path.split("/")
+        for tag in parents:
+            node = node.setdefault(tag, {})
+        node[leaf] = field
+    return tree
+
+
+def _collect_paths(node: Any, tree: Dict[str, Any], found: Dict[str, Any]) -> None:
+    """Walk ``node`` once along ``tree``, keeping the first element found for each field."""
+    for child in node:
+        branch = tree.get(child.tag)
+        if branch is None:
+            continue
+        if isinstance(branch, str):
+            found.setdefault(branch, child)
+        else:
+            _collect_paths(child, branch, found)
 
 
 class NovomaInvoiceParser:
@@ -20,10 +95,57 @@ class NovomaInvoiceParser:
     contain the XML attachment.
     """
 
-    XML_PATTERN = re.compile(
-        rb"<rsm:CrossIndustryInvoice[\s\S]+?</rsm:CrossIndustryInvoice>", re.MULTILINE
+    XML_START = _XML_START
+    XML_END = _XML_END
+
+    # Namespace-qualified (Clark notation) paths, built once instead of per lookup
+    _NS_RSM = "{urn:un:unece:uncefact:data:standard:CrossIndustryInvoice:100}"
+    _NS_RAM = "{urn:un:unece:uncefact:data:standard:ReusableAggregateBusinessInformationEntity:100}"
+    _NS_UDT = "{urn:un:unece:uncefact:data:standard:UnqualifiedDataType:100}"
+
+    _TAG_EXCHANGED_DOCUMENT = f"{_NS_RSM}ExchangedDocument"
+    _TAG_INVOICE_ID = f"{_NS_RAM}ID"
+    _TAG_ISSUE_DT = f"{_NS_RAM}IssueDateTime/{_NS_UDT}DateTimeString"
+    _TAG_SETTLEMENT_SUMMATION = f"{_NS_RAM}SpecifiedTradeSettlementHeaderMonetarySummation"
+    _TAG_GRAND_TOTAL = f"{_NS_RAM}GrandTotalAmount"
+    _TAG_TAX_TOTAL = f"{_NS_RAM}TaxTotalAmount"
+    _TAG_LINE_TOTAL = f"{_NS_RAM}LineTotalAmount"
+    # (header key, tag): grand total, tax total, subtotal (line items before tax)
+    _TOTAL_FIELDS = (
+        ("total_amount", _TAG_GRAND_TOTAL),
+        ("tax_total", _TAG_TAX_TOTAL),
+        ("subtotal", _TAG_LINE_TOTAL),
     )
 
+    _TAG_LINE_ITEM = f"{_NS_RAM}IncludedSupplyChainTradeLineItem"
+    _TAG_SKU = f"{_NS_RAM}SpecifiedTradeProduct/{_NS_RAM}SellerAssignedID"
+    _TAG_NAME = f"{_NS_RAM}SpecifiedTradeProduct/{_NS_RAM}Name"
+    _TAG_QTY = f"{_NS_RAM}SpecifiedLineTradeDelivery/{_NS_RAM}BilledQuantity"
+    _TAG_UNIT_PRICE = (
+        f"{_NS_RAM}SpecifiedLineTradeAgreement/{_NS_RAM}NetPriceProductTradePrice/{_NS_RAM}ChargeAmount"
+    )
+    _TAG_TOTAL = (
+        f"{_NS_RAM}SpecifiedLineTradeSettlement/{_NS_RAM}SpecifiedTradeSettlementLineMonetarySummation/{_NS_RAM}LineTotalAmount"
+    )
+    _TAG_VAT = (
+        f"{_NS_RAM}SpecifiedLineTradeSettlement/{_NS_RAM}ApplicableTradeTax/{_NS_RAM}RateApplicablePercent"
+    )
+
+    # All line-item fields, resolved together in one walk over the item's children
+    _LINE_ITEM_TREE = _build_path_tree(
+        {
+            "sku": _TAG_SKU,
+            "name": _TAG_NAME,
+            "qty": _TAG_QTY,
+            "unit_price": _TAG_UNIT_PRICE,
+            "total": _TAG_TOTAL,
+            "vat": _TAG_VAT,
+        }
+    )
+
+    # Elements picked up by the single streaming pass over the XML
+    _STREAM_TAGS = (_TAG_EXCHANGED_DOCUMENT, _TAG_SETTLEMENT_SUMMATION, _TAG_LINE_ITEM)
+
     def __init__(self) -> None:
         self.supplier_name = "Novoma"
         self.currency = "EUR"
@@ -31,15 +153,21 @@ class NovomaInvoiceParser:
     # ---------------------------------------------------------------------
     # Public API
     # ---------------------------------------------------------------------
-    def extract(self, pdf_path: str) -> Dict[str, Any]:
-        """Main extraction method with top-level validation and error handling."""
+    def extract(self, pdf_path: str, fast_fail: bool = False) -> Dict[str, Any]:
+        """Main extraction method with top-level validation and error handling.
+
+        With ``fast_fail`` validation stops at the total check when it already
+        failed, skipping the per-line checks (useful when rejecting many PDFs).
+        """
         try:
-            xml_root = self._extract_embedded_xml(pdf_path)
-            if xml_root is None:
+            xml_bytes = self._extract_embedded_xml(pdf_path)
+            if xml_bytes is None:
                 raise RuntimeError("Unable to locate embedded Factur-X XML in the document")
 
-            header_info = self._extract_header_info(xml_root)
-            line_items = self._extract_line_items(xml_root)
+            try:
+                header_info, line_items = self._parse_xml(xml_bytes)
+            except ET.ParseError:
+                raise RuntimeError("Unable to locate embedded Factur-X XML in the document")
 
             result: Dict[str, Any] = {
                 **header_info,
@@ -48,7 +176,7 @@ class NovomaInvoiceParser:
                 "currency": self.currency,
             }
 
-            validation_errors = self._validate_extraction(result)
+            validation_errors = self._validate_extraction(result, fast_fail=fast_fail)
             if validation_errors:
                 result["validation_errors"] = validation_errors
 
@@ -59,153 +187,163 @@ class NovomaInvoiceParser:
     # ------------------------------------------------------------------
     # Private helpers – XML extraction
     # ------------------------------------------------------------------
-    def _extract_embedded_xml(self, pdf_path: str) -> Optional[ET.Element]:
-        """Return root Element of the embedded Factur-X XML, if found."""
-        with open(pdf_path, "rb") as fp:
-            pdf_bytes = fp.read()
-
-        xml_match = self.XML_PATTERN.search(pdf_bytes)
-        if not xml_match:
-            return None
-
-        xml_bytes = xml_match.group(0)
-        try:
-            # The XML is declared as UTF-8 in all samples inspected.
-            xml_str = xml_bytes.decode("utf-8", errors="replace")
-            return ET.fromstring(xml_str)
-        except ET.ParseError:
-            return None
+    def _extract_embedded_xml(self, pdf_path: str) -> Optional[bytes]:
+        """Return the raw bytes of the embedded Factur-X XML, if found.
+
+        Repeated extractions of an unchanged PDF within one process are served
+        from a cache keyed on ``(path, st_mtime_ns, st_size)``.
+        """
+        st = os.stat(pdf_path)
+        return _load_xml_cached(pdf_path, st.st_mtime_ns, st.st_size)
+
+    def _iter_elements(self, xml_bytes: bytes, tags: Tuple[str, ...]) -> Iterator[Any]:
+        """Stream-parse the XML, yielding each completed element whose tag is in ``tags``.
+
+        Yielded elements are cleared once the caller moves on (and, with lxml,
+        detached along with already-processed siblings), so memory stays
+        proportional to one line item rather than the whole invoice.
+        """
+        # The parser honours the XML declaration (UTF-8 in all samples inspected).
+        source = io.BytesIO(xml_bytes)
+        if LXML_AVAILABLE:
+            for _event, el in ET.iterparse(source, events=("end",), tag=tags):
+                yield el
+                el.clear()
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+        else:
+            for _event, el in ET.iterparse(source, events=("end",)):
+                if el.tag in tags:
+                    yield el
+                    el.clear()
+
+    def _parse_xml(self, xml_bytes: bytes) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Collect header fields and line items in a single streaming pass."""
+        header: Dict[str, Any] = {}
+        items: List[Dict[str, Any]] = []
+        seen_document = seen_settlement = False
+
+        for el in self._iter_elements(xml_bytes, self._STREAM_TAGS):
+            tag = el.tag
+            if tag == self._TAG_LINE_ITEM:
+                item = self._extract_line_item(el)
+                if item is not None:
+                    items.append(item)
+            elif tag == self._TAG_EXCHANGED_DOCUMENT:
+                if not seen_document:
+                    seen_document = True
+                    self._extract_document_info(el, header)
+            elif not seen_settlement:
+                seen_settlement = True
+                self._extract_totals(el, header)
+
+        return header, items
 
     # ------------------------------------------------------------------
     # Extraction helpers – Header / line items
     # ------------------------------------------------------------------
     def _ns(self, tag: str) -> str:  # noqa: D401
         """Helper to shorten namespace lookups."""
-        return f"{{urn:un:unece:uncefact:data:standard:ReusableAggregateBusinessInformationEntity:100}}{tag}"
-
-    def _extract_header_info(self, root: ET.Element) -> Dict[str, Any]:
-        header: Dict[str, Any] = {}
-
-        # Navigate to the <rsm:ExchangedDocument> node
-        ns_rsm = "{urn:un:unece:uncefact:data:standard:CrossIndustryInvoice:100}"
-        ns_ram = "{urn:un:unece:uncefact:data:standard:ReusableAggregateBusinessInformationEntity:100}"
-        ns_udt = "{urn:un:unece:uncefact:data:standard:UnqualifiedDataType:100}"
-
-        doc_node = root.find(f"{ns_rsm}ExchangedDocument")
-        if doc_node is not None:
-            invoice_id_el = doc_node.find(f"{ns_ram}ID")
-            if invoice_id_el is not None and invoice_id_el.text:
-                header["invoice_number"] = invoice_id_el.text.strip()
-
-            issue_dt_el = doc_node.find(f"{ns_ram}IssueDateTime/{ns_udt}DateTimeString")
-            if issue_dt_el is not None and issue_dt_el.text:
-                # The date is YYYYMMDD (format 102)
-                val = issue_dt_el.text.strip()
-                if re.match(r"^\d{8}$", val):
-                    header["invoice_date"] = f"{val[0:4]}-{val[4:6]}-{val[6:8]}"
-
-        # Totals live under ApplicableHeaderTradeSettlement/SpecifiedTradeSettlementHeaderMonetarySummation
-        settlement_node = root.find(
-            f".//{ns_ram}ApplicableHeaderTradeSettlement/{ns_ram}SpecifiedTradeSettlementHeaderMonetarySummation"
-        )
-        if settlement_node is not None:
-            total_amount_el = settlement_node.find(f"{ns_ram}GrandTotalAmount")
-            if total_amount_el is not None and total_amount_el.text:
-                header["total_amount"] = float(total_amount_el.text.strip())
+        return f"{self._NS_RAM}{tag}"
+
+    def _extract_document_info(self, doc_node: Any, header: Dict[str, Any]) -> None:
+        """Invoice number and date from the <rsm:ExchangedDocument> node."""
+        find = doc_node.find
+        if (invoice_id_el := find(self._TAG_INVOICE_ID)) is not None and (text := invoice_id_el.text):
+            header["invoice_number"] = text.strip()
+
+        if (issue_dt_el := find(self._TAG_ISSUE_DT)) is not None and (text := issue_dt_el.text):
+            # The date is YYYYMMDD (format 102)
+            val = text.strip()
+            if _DATE8_RE.match(val):
+                header["invoice_date"] = f"{val[0:4]}-{val[4:6]}-{val[6:8]}"
+
+    def _extract_totals(self, settlement_node: Any, header: Dict[str, Any]) -> None:
+        """Totals from SpecifiedTradeSettlementHeaderMonetarySummation."""
+        find = settlement_node.find
+        for key, tag in self._TOTAL_FIELDS:
+            if (el := find(tag)) is not None and (text := el.text):
+                header[key] = float(text.strip())
+
+    def _extract_line_item(self, item_el: Any) -> Optional[Dict[str, Any]]:
+        """Build one line item, or return None for malformed entries."""
+        try:
+            found: Dict[str, Any] = {}
+            _collect_paths(item_el, self._LINE_ITEM_TREE, found)
+            get = found.get
+            sku_el = get("sku")
+            name_el = get("name")
+            qty_el = get("qty")
+            unit_price_el = get("unit_price")
+            total_el = get("total")
+            vat_el = get("vat")
+
+            if not (sku_el is not None and name_el is not None and qty_el is not None and unit_price_el is not None and total_el is not None):
+                # Skip malformed entries - debug what's missing
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Skipping item - missing elements: sku=%s, name=%s, qty=%s, unit_price=%s, total=%s",
+                        sku_el is not None, name_el is not None, qty_el is not None,
+                        unit_price_el is not None, total_el is not None,
+                    )
+                return None
+
+            # Quantity may be decimal with unitCode attr -> int when whole,
+            # Decimal otherwise so validation can multiply it directly
+            qty_raw = qty_el.text.strip()
+            quantity = Decimal(qty_raw)
+            if quantity == quantity.to_integral_value():
+                quantity = int(quantity)
+
+            unit_price = float(unit_price_el.text.strip())
+            total_price = float(total_el.text.strip())
             
-            # Extract tax total amount
-            tax_total_el = settlement_node.find(f"{ns_ram}TaxTotalAmount")
-            if tax_total_el is not None and tax_total_el.text:
-                header["tax_total"] = float(tax_total_el.text.strip())
+            # Apply VAT to unit price if VAT rate is available
+            if vat_el is not None and (vat_text := vat_el.text):
+                # Convert from HT to TTC (apply VAT)
+                unit_price = round(unit_price * _vat_factor(vat_text.strip()), 2)
             
-            # Extract subtotal (line items total before tax)
-            subtotal_el = settlement_node.find(f"{ns_ram}LineTotalAmount")
-            if subtotal_el is not None and subtotal_el.text:
-                header["subtotal"] = float(subtotal_el.text.strip())
-
-        return header
-
-    def _extract_line_items(self, root: ET.Element) -> List[Dict[str, Any]]:
-        ns_ram = "{urn:un:unece:uncefact:data:standard:ReusableAggregateBusinessInformationEntity:100}"
-
-        items: List[Dict[str, Any]] = []
-        for item_el in root.findall(f".//{ns_ram}IncludedSupplyChainTradeLineItem"):
-            try:
-                sku_el = item_el.find(f"{ns_ram}SpecifiedTradeProduct/{ns_ram}SellerAssignedID")
-                name_el = item_el.find(f"{ns_ram}SpecifiedTradeProduct/{ns_ram}Name")
-                qty_el = item_el.find(f"{ns_ram}SpecifiedLineTradeDelivery/{ns_ram}BilledQuantity")
-                unit_price_el = item_el.find(
-                    f"{ns_ram}SpecifiedLineTradeAgreement/{ns_ram}NetPriceProductTradePrice/{ns_ram}ChargeAmount"
-                )
-                total_el = item_el.find(
-                    f"{ns_ram}SpecifiedLineTradeSettlement/{ns_ram}SpecifiedTradeSettlementLineMonetarySummation/{ns_ram}LineTotalAmount"
-                )
-                vat_el = item_el.find(
-                    f"{ns_ram}SpecifiedLineTradeSettlement/{ns_ram}ApplicableTradeTax/{ns_ram}RateApplicablePercent"
-                )
-
-                if not (sku_el is not None and name_el is not None and qty_el is not None and unit_price_el is not None and total_el is not None):
-                    # Skip malformed entries - debug what's missing
-                    print(f"Skipping item - missing elements: sku={sku_el is not None}, name={name_el is not None}, qty={qty_el is not None}, unit_price={unit_price_el is not None}, total={total_el is not None}")
-                    continue
-
-                # Quantity may be decimal with unitCode attr -> convert to int/float
-                qty_raw = qty_el.text.strip()
-                quantity: float = float(qty_raw)
-                # Decide int or float depending on .0
-                if quantity.is_integer():
-                    quantity = int(quantity)
-
-                unit_price = float(unit_price_el.text.strip())
-                total_price = float(total_el.text.strip())
-                
-                # Apply VAT to unit price if VAT rate is available
-                if vat_el is not None and vat_el.text:
-                    vat_rate = float(vat_el.text.strip())
-                    # Convert from HT to TTC (apply VAT)
-                    unit_price = round(unit_price * (1 + vat_rate / 100), 2)
-                
-                # Calculate total from VAT-inclusive unit price and quantity
-                calculated_total = round(unit_price * quantity, 2)
-
-                items.append(
-                    {
-                        "sku": sku_el.text.strip(),
-                        "description": name_el.text.strip(),
-                        "quantity": quantity,
-                        "unit_price": round(unit_price, 2),
-                        "total": calculated_total,
-                    }
-                )
-            except Exception:
-                # Skip problematic items but continue parsing others
-                continue
-
-        return items
+            # Calculate total from VAT-inclusive unit price and quantity
+            calculated_total = round(unit_price * float(quantity), 2)
+
+            # Amounts are stored as Decimal once here, so validation can sum
+            # them without a Decimal(str(float)) round-trip per line
+            return {
+                "sku": sku_el.text.strip(),
+                "description": name_el.text.strip(),
+                "quantity": quantity,
+                "unit_price": Decimal(str(round(unit_price, 2))),
+                "total": Decimal(str(calculated_total)),
+            }
+        except Exception:
+            # Skip problematic items but continue parsing others
+            return None
 
     # ------------------------------------------------------------------
     # Validation helpers
     # ------------------------------------------------------------------
-    def _validate_extraction(self, data: Dict[str, Any]) -> List[str]:
+    def _validate_extraction(self, data: Dict[str, Any], fast_fail: bool = False) -> List[str]:
         errors: List[str] = []
 
         # Total consistency
         if "line_items" in data and "total_amount" in data:
             # Since unit prices now include VAT, calculate total from VAT-inclusive prices
             calculated = sum(
-                Decimal(str(item.get("quantity", 0))) * Decimal(str(item.get("unit_price", 0)))
-                for item in data["line_items"]
+                (item["quantity"] * item["unit_price"] for item in data["line_items"]),
+                Decimal("0"),
             )
             declared = Decimal(str(data["total_amount"]))
             
-            print(f"Debug: Calculated total (qty × VAT-inclusive unit price): {calculated}")
-            print(f"Debug: Declared total: {declared}")
+            logger.debug("Calculated total (qty × VAT-inclusive unit price): %s", calculated)
+            logger.debug("Declared total: %s", declared)
             
             # Allow for small rounding differences (1.00 to account for cumulative rounding in VAT calculations)
             if abs(calculated - declared) > Decimal("1.00"):
                 errors.append(
                     f"Total mismatch: calculated {calculated} vs declared {declared}"
                 )
+        if fast_fail and errors:
+            return errors
 
         # Required fields
         for field in ["invoice_number", "invoice_date", "line_items"]:
@@ -213,15 +351,17 @@ class NovomaInvoiceParser:
                 errors.append(f"Missing required field: {field}")
 
         # Line-item checks
+        add_error = errors.append
         for idx, item in enumerate(data.get("line_items", []), start=1):
-            if not item.get("sku"):
-                errors.append(f"Line {idx}: missing SKU")
-            if not item.get("description"):
-                errors.append(f"Line {idx}: missing description")
-            if item.get("quantity", 0) <= 0:
-                errors.append(f"Line {idx}: invalid quantity")
-            if item.get("total", 0) <= 0:
-                errors.append(f"Line {idx}: invalid total")
+            get = item.get
+            if not get("sku"):
+                add_error(f"Line {idx}: missing SKU")
+            if not get("description"):
+                add_error(f"Line {idx}: missing description")
+            if get("quantity", 0) <= 0:
+                add_error(f"Line {idx}: invalid quantity")
+            if get("total", 0) <= 0:
+                add_error(f"Line {idx}: invalid total")
 
         return errors
 
@@ -230,11 +370,20 @@ class NovomaInvoiceParser:
 # CLI utility for quick testing
 # ----------------------------------------------------------------------
 
+class _DecimalEncoder(json.JSONEncoder):
+    """Emit Decimal amounts as JSON numbers, as the float-based output did."""
+
+    def default(self, o: Any) -> Any:
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
 def _test(pdf_path: str) -> None:  # pragma: no cover
     parser = NovomaInvoiceParser()
     result = parser.extract(pdf_path)
     print("=== NOVOMA INVOICE EXTRACTION ===")
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(json.dumps(result, indent=2, ensure_ascii=False, cls=_DecimalEncoder))
     if "validation_errors" in result:
         print("\n=== VALIDATION ERRORS ===")
         for err in result["validation_errors"]:
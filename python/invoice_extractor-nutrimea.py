@@ -1,24 +1,75 @@
 import re
 import json
+import logging
 from decimal import Decimal
 from pdfminer.high_level import extract_text
 from pdfminer.layout import LAParams
 
+_REF_RE = re.compile(r'^\d{3,}(?:_NUT)?$')
+_PRICE_RE = re.compile(r'^\d+,\d{2} €$')
+_QTY_RE = re.compile(r'^\d+$')
+_TOTAL_RE = re.compile(r'^([\d ]+,\d{2}) €$')
+_DATA_RE = re.compile(r'^\d+,\d{2} €|^\d+$')
+_LETTER_RE = re.compile(r'[A-Za-z]')
+
+logger = logging.getLogger(__name__)
+
+# Data token kinds used by the line-item grouping loop
+_PRICE = 0
+_QTY = 1
+
+
+def _group_data_kinds(kinds):
+    """Find the unit-price / quantity / total runs in a sequence of token kinds.
+
+    Tokens come as a run of unit prices, a run of quantities and as many
+    totals as there were quantities. Returns (unit_start, qty_start,
+    total_start, count) for every group whose three runs have equal length.
+    Works on the small int kinds only, so the tokens are sliced once per group.
+    """
+    groups = []
+    n = len(kinds)
+    i = 0
+    while i < n:
+        unit_start = i
+        while i < n and kinds[i] == _PRICE:
+            i += 1
+        qty_start = i
+        while i < n and kinds[i] == _QTY:
+            i += 1
+        total_start = i
+        expected = total_start - qty_start
+        while i < n and i - total_start < expected and kinds[i] == _PRICE:
+            i += 1
+        if i == unit_start:
+            # Token matching neither kind: skip it instead of spinning forever
+            i += 1
+            continue
+        count = qty_start - unit_start
+        if count and count == expected == i - total_start:
+            groups.append((unit_start, qty_start, total_start, count))
+    return groups
+
+
 class NutrimeaInvoiceParser:
     def __init__(self):
         self.supplier_name = "Nutrimea"
         self.currency = "EUR"  # From the PDF using €
 
-    def extract(self, pdf_path):
-        """Main extraction method with error handling"""
+    def extract(self, pdf_path, fast_fail=False):
+        """Main extraction method with error handling (fast_fail: stop validation at the first failed check)"""
         try:
-            # Extract text with layout analysis
+            # Extract text with layout analysis. The parser relies on pdfminer
+            # emitting each table column as its own run of lines ('Référence',
+            # 'Total produits', ...); PDFium / Poppler text output is row-ordered
+            # and merges those markers into header rows, so it cannot be swapped in.
             laparams = LAParams(boxes_flow=0.0, word_margin=0.1)
             raw_text = extract_text(pdf_path, laparams=laparams)
+            lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
             
             # Parse components
-            header_info = self._extract_header_info(raw_text)
-            line_items = self._extract_line_items(raw_text)
+            header_info = self._extract_header_info(lines)
+            line_items, items_total_cents = self._extract_line_items(lines)
             
             # Build result
             result = {
@@ -29,7 +80,7 @@ class NutrimeaInvoiceParser:
             }
             
             # Validate before returning
-            validation_errors = self._validate_extraction(result)
+            validation_errors = self._validate_extraction(result, items_total_cents, fast_fail=fast_fail)
             if validation_errors:
                 result['validation_errors'] = validation_errors
             
@@ -38,10 +89,8 @@ class NutrimeaInvoiceParser:
         except Exception as e:
             return {'error': f"Extraction failed: {str(e)}"}
 
-    def _extract_header_info(self, text):
-        """Extract invoice metadata"""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+    def _extract_header_info(self, lines):
+        """Extract invoice metadata from the stripped, non-empty text lines"""
         header = {}
         
         try:
@@ -54,87 +103,87 @@ class NutrimeaInvoiceParser:
         except (ValueError, IndexError):
             pass
         
-        # Extract total amount
+        # Extract total amount: last 'Total' label followed by an amount.
+        # list.index on the reversed lines does the backward scan in C.
+        reversed_lines = lines[::-1]
+        last = len(lines) - 1
+        k = 0
         try:
-            for j in range(len(lines)-1, -1, -1):
-                if lines[j] == 'Total':
-                    next_line = lines[j+1]
-                    total_match = re.match(r'^([\d ]+,\d{2}) €$', next_line)
-                    if total_match:
-                        total_str = total_match.group(1).replace(' ', '').replace(',', '.')
-                        header['total_amount'] = Decimal(total_str)
-                        break
+            while True:
+                k = reversed_lines.index('Total', k)
+                next_line = lines[last - k + 1]
+                total_match = _TOTAL_RE.match(next_line)
+                if total_match:
+                    total_str = total_match.group(1).replace(' ', '').replace(',', '.')
+                    header['total_amount'] = Decimal(total_str)
+                    break
+                k += 1
         except ValueError:
             pass
         
         return header
     
-    def _extract_line_items(self, text):
-        """Extract product line items with cross-page reconstruction"""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+    def _extract_line_items(self, lines):
+        """Extract product line items with cross-page reconstruction.
+
+        Returns the items and the sum of their totals in integer cents.
+        """
         # Find table start and end
         try:
             table_start = lines.index('Référence')
             table_end = lines.index('Total produits')
         except ValueError:
-            return []
+            return [], 0
         
         table_lines = lines[table_start:table_end]
         
-        # Collect references
-        refs = [l for l in table_lines if re.match(r'^\d{3,}(?:_NUT)?$', l)]
-        
-        # Collect product lines
-        product_lines = [l for l in table_lines if re.search(r'[A-Za-z]', l) and ('*' in l or 'FR' in l)]
+        # Classify every table line once: references, product description
+        # lines, and data tokens (prices and quantities, excluding refs)
+        refs = []
+        product_lines = []
+        data_tokens = []
+        data_kinds = []
+        for l in table_lines:
+            if _REF_RE.match(l):
+                refs.append(l)
+                continue
+            if _LETTER_RE.search(l) and ('*' in l or 'FR' in l):
+                product_lines.append(l)
+            if _DATA_RE.match(l):
+                data_tokens.append(l)
+                if _PRICE_RE.match(l):
+                    data_kinds.append(_PRICE)
+                elif _QTY_RE.match(l):
+                    data_kinds.append(_QTY)
+                else:
+                    data_kinds.append(None)
         
-        # Group product descriptions (every 2 lines)
-        descriptions = [' '.join(product_lines[i:i+2]) for i in range(0, len(product_lines), 2)]
+        # Group product descriptions (every 2 lines; a trailing odd line stands alone)
+        descriptions = [f"{a} {b}" for a, b in zip(product_lines[0::2], product_lines[1::2])]
+        if len(product_lines) % 2:
+            descriptions.append(product_lines[-1])
         
-        # Collect data tokens (prices and quantities, excluding refs)
-        data_tokens = [l for l in table_lines if re.match(r'^\d+,\d{2} €|^\d+$', l) and l not in refs]
-        print("Debug: data_tokens =", data_tokens)
+        logger.debug("data_tokens = %s", data_tokens)
         
         # Parse data tokens into unit_prices, qtys, totals using group collection
         unit_prices = []
         qtys = []
         totals = []
-        i = 0
-        while i < len(data_tokens):
-            current_unit = []
-            while i < len(data_tokens) and re.match(r'^\d+,\d{2} €$', data_tokens[i]):
-                current_unit.append(data_tokens[i])
-                i += 1
-            
-            current_qty = []
-            while i < len(data_tokens) and re.match(r'^\d+$', data_tokens[i]):
-                current_qty.append(data_tokens[i])
-                i += 1
-            
-            current_total = []
-            expected = len(current_qty)
-            for _ in range(expected):
-                if i < len(data_tokens) and re.match(r'^\d+,\d{2} €$', data_tokens[i]):
-                    current_total.append(data_tokens[i])
-                    i += 1
-                else:
-                    break
-            
-            if current_unit and current_qty and current_total and len(current_unit) == len(current_qty) == len(current_total):
-                unit_prices.extend(current_unit)
-                qtys.extend(current_qty)
-                totals.extend(current_total)
+        for unit_start, qty_start, total_start, count in _group_data_kinds(data_kinds):
+            unit_prices.extend(data_tokens[unit_start:unit_start + count])
+            qtys.extend(data_tokens[qty_start:qty_start + count])
+            totals.extend(data_tokens[total_start:total_start + count])
         
         # Build line items
         line_items = []
-        print("Debug: len(refs) =", len(refs))
-        print("Debug: len(product_lines) =", len(product_lines))
-        print("Debug: len(descriptions) =", len(descriptions))
-        print("Debug: len(data_tokens) =", len(data_tokens))
-        print("Debug: len(unit_prices) =", len(unit_prices))
-        print("Debug: len(qtys) =", len(qtys))
-        print("Debug: len(totals) =", len(totals))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "refs=%d product_lines=%d descriptions=%d data_tokens=%d unit_prices=%d qtys=%d totals=%d",
+                len(refs), len(product_lines), len(descriptions), len(data_tokens),
+                len(unit_prices), len(qtys), len(totals),
+            )
         num_items = min(len(refs), len(descriptions), len(unit_prices), len(qtys), len(totals))
+        total_cents = 0
         for idx in range(num_items):
             unit_str = unit_prices[idx].replace(' €', '').replace(',', '.')
             total_str = totals[idx].replace(' €', '').replace(',', '.')
@@ -145,20 +194,27 @@ class NutrimeaInvoiceParser:
                 'quantity': int(qtys[idx]),
                 'total': Decimal(total_str)
             })
+            # Totals always have exactly two decimals, so dropping the point gives cents
+            total_cents += int(total_str.replace('.', ''))
         
-        return line_items
+        return line_items, total_cents
     
-    def _validate_extraction(self, data):
+    def _validate_extraction(self, data, items_total_cents=None, fast_fail=False):
         """Comprehensive validation"""
         errors = []
         
-        # Check mathematical consistency
+        # Check mathematical consistency in integer cents
         if 'line_items' in data and 'total_amount' in data:
-            calculated = sum(Decimal(str(item.get('total', 0))) for item in data['line_items'])
-            declared = Decimal(str(data['total_amount']))
+            if items_total_cents is None:
+                items_total_cents = sum(int(item['total'] * 100) for item in data['line_items'])
+            declared = data['total_amount']
+            declared_cents = int(declared * 100)
             
-            if abs(calculated - declared) > Decimal('0.01'):
+            if abs(items_total_cents - declared_cents) > 1:
+                calculated = Decimal(items_total_cents).scaleb(-2)
                 errors.append(f"Total mismatch: calculated {calculated} vs declared {declared}")
+        if fast_fail and errors:
+            return errors
         
         # Check completeness
         required_fields = ['invoice_number', 'invoice_date', 'line_items']
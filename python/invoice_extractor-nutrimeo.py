@@ -1,27 +1,196 @@
+import io
 import re
+import copy
 import json
+import hashlib
+from collections import OrderedDict
+from functools import partial
 from decimal import Decimal
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
 from datetime import datetime
 
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    from .batch_utils import extract_batch
+except ImportError:
+    from batch_utils import extract_batch
+
+
+def _compile_scan(pattern):
+    """Compile a lazy scanning pattern with RE2 (linear-time DFA) when available.
+
+    Patterns use inline flags only, so the same source works with both engines.
+    They are compiled as UTF-8 bytes patterns and run on the encoded text: RE2
+    would otherwise re-encode the whole str on every search, and stdlib re
+    scans bytes faster too.
+    """
+    pattern = pattern.encode('utf-8')
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern)
+
+
+# pdfminer takes ~0.1s to import; it is loaded on first use so PDFium and
+# cached extractions never pay for it
+_pdfminer = None
+
+
+def _extract_text_pdfminer(pdf_file):
+    """pdfminer text with layout analysis, importing pdfminer on first call"""
+    global _pdfminer
+    if _pdfminer is None:
+        from pdfminer.high_level import extract_text
+        from pdfminer.layout import LAParams
+        # Layout analysis settings. The line-item parser depends on the text-box
+        # ordering these produce: without layout analysis pdfminer emits no line
+        # breaks at all, and boxes_flow=None reorders the table columns.
+        _pdfminer = (extract_text, LAParams(boxes_flow=0.5, word_margin=0.1))
+    extract_text, laparams = _pdfminer
+    return extract_text(pdf_file, laparams=laparams)
+
+# Header fields in output order: (field, literal label, value pattern matched
+# right after the label). Labels are located with str.find, so the value
+# pattern only ever runs on the few characters that follow them.
+_HEADER_PROBES = (
+    ('invoice_number', 'Num. Facture', re.compile(r'\s+([A-Z0-9-]+)')),
+    ('invoice_date', 'Date Facture', re.compile(r'\s+(\d{1,2}\s+\w+\.?\s+\d{4})')),
+    ('client_number', 'Num. client', re.compile(r'\s+(\d+)')),
+    ('order_number', 'Num. commande', re.compile(r'\s+(\d+)')),
+    ('total_amount', 'À payer', re.compile(r'\s+([\d,]+\.\d{2})\s*€')),
+    ('subtotal_ht', 'Sous-total HT', re.compile(r'\s+([\d,]+\.\d{2})\s*€')),
+)
+_AMOUNT_HEADER_FIELDS = frozenset(('total_amount', 'subtotal_ht'))
+
+
+def _find_labelled(text, label, value_re):
+    """Value captured right after the first occurrence of label where value_re matches"""
+    start = text.find(label)
+    while start != -1:
+        match = value_re.match(text, start + len(label))
+        if match:
+            return match.group(1)
+        start = text.find(label, start + 1)
+    return None
+
+
+# Abbreviated French month names as printed in "11 sept. 2024"
+_FRENCH_MONTHS = {
+    'janv': '01', 'févr': '02', 'mars': '03', 'avr': '04',
+    'mai': '05', 'juin': '06', 'juil': '07', 'août': '08',
+    'sept': '09', 'oct': '10', 'nov': '11', 'déc': '12'
+}
+# "Frais de port HT" followed by amount (may be on different lines)
+_SHIPPING_RE = _compile_scan(r'(?s)Frais de port HT.*?([\d,]+,\d{2})\s*€')
+# Three amounts after "À payer": subtotal, shipping, total
+_SUMMARY_RE = _compile_scan(
+    r'(?s)À payer.*?([\d,]+,\d{2})\s*€.*?([\d,]+,\d{2})\s*€.*?([\d,]+,\d{2})\s*€'
+)
+
+# Shipping HT above this is taken to be a misread subtotal/total
+_MAX_SHIPPING_HT = 100.0
+
+
+def _plausible_shipping(amount_bytes):
+    """Shipping HT from an amount like b'17,44', or None if it is not a plausible shipping fee"""
+    try:
+        amount = float(amount_bytes.replace(b',', b'.'))
+    except ValueError:
+        return None
+    return amount if amount < _MAX_SHIPPING_HT else None
+
+
+# Line items
+# One stripped line per match (whitespace other than the newline trimmed)
+_LINE_RE = re.compile(r'^[^\S\n]*(.*?)[^\S\n]*$', re.MULTILINE)
+_SKU_RE = re.compile(r'^\d{4,5}$')
+_LETTER_RE = re.compile(r'[A-Za-z]')
+# Lines with letters that are table/summary labels, never product names
+_NON_DESCRIPTION_LINES = frozenset(('Taux', 'Base HT', 'TVA', 'Mode de paiement'))
+# A SKU's description is taken from the lines within this distance after it
+_DESCRIPTION_WINDOW = 9
+_QTY_RE = re.compile(r'^\d{1,2}$')
+_PRICE_RE = re.compile(r'^([\d]+,[\d]{2})\s+€$')
+_VAT_LINE_RE = re.compile(r'^\d+\.\d+%$')
+_VAT_RE = re.compile(r'(\d+\.\d+)%')
+
+# Row-ordered table text (PDFium backend): "8489 Barebells Protein Bar", then
+# "2 20,99 € 5.5% 22,14 € 44,29 €" = quantity, Prix u. HT, TVA, Prix u. TTC, Total TTC
+_ROW_SKU_RE = re.compile(r'^(\d{4,5}) (.+)$')
+_ROW_DATA_RE = re.compile(r'^(\d+) (\d+,\d{2}) € (\d+(?:\.\d+)?)% (\d+,\d{2}) € (\d+,\d{2}) €$')
+
+
+def _extract_raw_text_pdfium(pdf_bytes):
+    """Page texts joined with newlines, read with PDFium (C++) instead of pdfminer"""
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        return '\n'.join(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+
+
+# Extraction results keyed by (sha256 of the PDF bytes, backend, parser
+# version), so re-submitted PDFs skip the whole pipeline. Bump the version
+# whenever a change alters the extracted output.
+_PARSER_VERSION = '1'
+_RESULT_CACHE_SIZE = 512
+_result_cache = OrderedDict()
+
+
 class NutrimeoInvoiceParser:
     def __init__(self):
         self.supplier_name = "Nutrimeo"
         self.currency = "EUR"
+        # Shipping fee (HT) found while parsing line items, reset per extract()
+        self._shipping_fee = None
         
-    def extract(self, pdf_path):
-        """Main extraction method with error handling"""
+    def extract(self, pdf_path, backend='pdfminer', fast_fail=False):
+        """Main extraction method with error handling
+
+        With fast_fail only the first validation error is reported, for callers
+        that just need pass/fail.
+
+        backend='pdfium' reads the text with PDFium, far faster than pdfminer's
+        layout analysis, and parses its row-ordered table. pdfminer is used
+        instead when pypdfium2 is not installed or its text yields no line items.
+        """
         try:
+            if backend not in ('pdfminer', 'pdfium'):
+                raise ValueError(f"Unknown text backend: {backend}")
+            
+            # Read the file once: the bytes are both hashed and parsed
+            with open(pdf_path, 'rb') as fp:
+                pdf_bytes = fp.read()
+            cache_key = (hashlib.sha256(pdf_bytes).hexdigest(), backend, fast_fail, _PARSER_VERSION)
+            cached = _result_cache.get(cache_key)
+            if cached is not None:
+                _result_cache.move_to_end(cache_key)
+                return copy.deepcopy(cached)
+            
             # Initialize shipping fee
             self._shipping_fee = None
             
-            # Extract text with layout analysis
-            laparams = LAParams(boxes_flow=0.5, word_margin=0.1)
-            raw_text = extract_text(pdf_path, laparams=laparams)
-            
             # Parse components - process line items first to capture shipping fee
-            line_items = self._extract_line_items(raw_text)
+            line_items = []
+            if backend == 'pdfium' and PDFIUM_AVAILABLE:
+                raw_text = _extract_raw_text_pdfium(pdf_bytes)
+                line_items = self._extract_line_items_rows(raw_text)
+            if not line_items:
+                # Extract text with layout analysis
+                raw_text = _extract_text_pdfminer(io.BytesIO(pdf_bytes))
+                line_items = self._extract_line_items(raw_text)
             header_info = self._extract_header_info(raw_text)
             
             # Build result
@@ -33,10 +202,15 @@ class NutrimeoInvoiceParser:
             }
             
             # Validate before returning
-            validation_errors = self._validate_extraction(result)
+            validation_errors = self._validate_extraction(result, fast_fail=fast_fail)
             if validation_errors:
                 result['validation_errors'] = validation_errors
             
+            # Callers get their own copy; the cached one stays untouched
+            _result_cache[cache_key] = copy.deepcopy(result)
+            if len(_result_cache) > _RESULT_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+            
             return result
             
         except Exception as e:
@@ -44,76 +218,36 @@ class NutrimeoInvoiceParser:
     
     def _extract_header_info(self, text):
         """Extract invoice metadata"""
+        # Invoice/client/order numbers, invoice date, total and subtotal HT
         header_info = {}
-        
-        # Extract invoice number
-        invoice_match = re.search(r'Num\. Facture\s+([A-Z0-9-]+)', text)
-        if invoice_match:
-            header_info['invoice_number'] = invoice_match.group(1)
-        
-        # Extract invoice date
-        date_match = re.search(r'Date Facture\s+(\d{1,2}\s+\w+\.?\s+\d{4})', text)
-        if date_match:
-            date_str = date_match.group(1)
-            # Convert French date format to standard format
-            header_info['invoice_date'] = self._parse_french_date(date_str)
-        
-        # Extract client number
-        client_match = re.search(r'Num\. client\s+(\d+)', text)
-        if client_match:
-            header_info['client_number'] = client_match.group(1)
-        
-        # Extract order number
-        order_match = re.search(r'Num\. commande\s+(\d+)', text)
-        if order_match:
-            header_info['order_number'] = order_match.group(1)
-        
-        # Extract total amount
-        total_match = re.search(r'À payer\s+([\d,]+\.\d{2})\s*€', text)
-        if total_match:
-            total_str = total_match.group(1).replace(',', '')
-            header_info['total_amount'] = float(total_str)
-        
-        # Extract subtotal HT
-        subtotal_match = re.search(r'Sous-total HT\s+([\d,]+\.\d{2})\s*€', text)
-        if subtotal_match:
-            subtotal_str = subtotal_match.group(1).replace(',', '')
-            header_info['subtotal_ht'] = float(subtotal_str)
+        for field, label, value_re in _HEADER_PROBES:
+            value = _find_labelled(text, label, value_re)
+            if value is None:
+                continue
+            if field == 'invoice_date':
+                # Convert French date format to standard format
+                value = self._parse_french_date(value)
+            elif field in _AMOUNT_HEADER_FIELDS:
+                value = float(value.replace(',', ''))
+            header_info[field] = value
         
         # Try to extract shipping cost with multiple patterns
         shipping_ht = None
         
-        # Pattern 1: Look for "Frais de port HT" followed by amount (may be on different lines)
-        shipping_pattern1 = r'Frais de port HT[\s\S]*?([\d,]+,\d{2})\s*€'
-        shipping_match1 = re.search(shipping_pattern1, text, re.MULTILINE | re.DOTALL)
-        
+        # Pattern 1: Look for "Frais de port HT" followed by amount (may be on different lines).
+        # In column-ordered text the first amount after the label can be the
+        # subtotal, which the plausibility check rejects.
+        text_bytes = text.encode('utf-8')
+        shipping_match1 = _SHIPPING_RE.search(text_bytes)
         if shipping_match1:
-            # Check if this is actually the shipping amount (not subtotal)
-            amount_str = shipping_match1.group(1)
-            if amount_str != '274,87':  # Avoid capturing subtotal
-                shipping_str = amount_str.replace(',', '.')
-                try:
-                    shipping_ht = float(shipping_str)
-                except ValueError:
-                    pass
+            shipping_ht = _plausible_shipping(shipping_match1.group(1))
         
         # Pattern 2: Look for shipping amount in summary section (second amount after "À payer")
         if shipping_ht is None:
             # Look for three amounts after "À payer": subtotal, shipping, total
-            summary_pattern = r'À payer[\s\S]*?([\d,]+,\d{2})\s*€[\s\S]*?([\d,]+,\d{2})\s*€[\s\S]*?([\d,]+,\d{2})\s*€'
-            summary_match = re.search(summary_pattern, text, re.MULTILINE | re.DOTALL)
+            summary_match = _SUMMARY_RE.search(text_bytes)
             if summary_match:
-                subtotal_str = summary_match.group(1)
-                shipping_str = summary_match.group(2).replace(',', '.')
-                total_str = summary_match.group(3)
-                
-                try:
-                    potential_shipping = float(shipping_str)
-                    # Verify this is a reasonable shipping amount (typically less than 100€)
-                    if potential_shipping < 100.0:
-                        shipping_ht = potential_shipping
-                except ValueError:
-                    pass
+                shipping_ht = _plausible_shipping(summary_match.group(2))
         
         # Apply 20% VAT if shipping amount found
         if shipping_ht:
@@ -121,7 +255,7 @@ class NutrimeoInvoiceParser:
             header_info['shipping_cost'] = round(shipping_ht * 1.20, 2)
         
         # Final fallback: Include shipping fee from line items processing if available and no HT found
-        if 'shipping_cost' not in header_info and hasattr(self, '_shipping_fee') and self._shipping_fee:
+        if 'shipping_cost' not in header_info and self._shipping_fee:
             header_info['shipping_ht'] = self._shipping_fee
             header_info['shipping_cost'] = round(self._shipping_fee * 1.20, 2)
         
@@ -131,38 +265,48 @@ class NutrimeoInvoiceParser:
         """Extract product line items with cross-page reconstruction"""
         line_items = []
         
-        # Split text into lines for analysis
-        lines = text.split('\n')
+        # Split text into already-stripped lines in one C-level pass; the
+        # lookahead windows below index into it by line number
+        lines = _LINE_RE.findall(text)
         
-        # Find SKUs and product descriptions
-        products = []
-        for i, line in enumerate(lines):
-            line = line.strip()
-            # Look for numeric SKU pattern (4-5 digits)
-            if re.match(r'^\d{4,5}$', line):
-                # Get description from next non-empty lines
-                description_parts = []
-                for j in range(i+1, min(i+10, len(lines))):
-                    next_line = lines[j].strip()
-                    if next_line and not re.match(r'^\d{4,5}$', next_line) and not next_line.startswith('DLUO'):
-                        # Check if it's a product name (contains letters)
-                        if re.search(r'[A-Za-z]', next_line) and not next_line in ['Taux', 'Base HT', 'TVA', 'Mode de paiement']:
-                            description_parts.append(next_line)
-                        if len(description_parts) >= 2:  # Usually product name + variant
-                            break
-                description = ' '.join(description_parts)
-                if description:
-                    products.append({
-                        'sku': line,
-                        'description': description
-                    })
-        
-        # Find table structure - look for header row with "Quantité"
+        # Classify every line in a single pass: SKUs and their descriptions,
+        # and the table and quantity anchors
+        skus_seen = []  # [sku, description_parts, last line of its window]
+        pending = []  # SKUs still collecting description lines, oldest first
         table_start_idx = -1
+        quantity_start = -1
         for i, line in enumerate(lines):
-            if 'Quantité' in line:
+            # Look for numeric SKU pattern (4-5 digits)
+            is_sku = _SKU_RE.match(line)
+            if pending:
+                # Windows close in SKU order, so expired SKUs are at the front
+                while pending and pending[0][2] < i:
+                    del pending[0]
+                # Product name lines (contain letters) feed every open SKU;
+                # the oldest SKU has the most parts, so it completes first
+                if (line and not is_sku and not line.startswith('DLUO')
+                        and _LETTER_RE.search(line) and line not in _NON_DESCRIPTION_LINES):
+                    for state in pending:
+                        state[1].append(line)
+                    while pending and len(pending[0][1]) >= 2:  # Usually product name + variant
+                        del pending[0]
+            if is_sku:
+                state = [line, [], i + _DESCRIPTION_WINDOW]
+                skus_seen.append(state)
+                pending.append(state)
+            # Table header row contains "Quantité"
+            if table_start_idx == -1 and 'Quantité' in line:
                 table_start_idx = i
-                break
+            # Quantities section follows "Mode de paiement"
+            if quantity_start == -1 and line == "Mode de paiement":
+                quantity_start = i + 1
+        
+        # SKUs with a description become products
+        products = [
+            {'sku': sku, 'description': ' '.join(description_parts)}
+            for sku, description_parts, _ in skus_seen
+            if description_parts
+        ]
         
         # Extract quantities, unit prices (TTC), and totals from table structure
         quantities = []
@@ -170,22 +314,15 @@ class NutrimeoInvoiceParser:
         total_prices = []
         
         if table_start_idx != -1:
-            # Find quantities section (after products, before pricing data)
-            quantity_start = -1
-            for i, line in enumerate(lines):
-                if line.strip() == "Mode de paiement":
-                    quantity_start = i + 1
-                    break
-            
             if quantity_start != -1:
                 # Extract quantities (consecutive single/double digit numbers)
                 # Based on user feedback, we should have 7 quantities: [2, 4, 4, 1, 1, 1, 1]
                 for i in range(quantity_start, quantity_start + 15):  # Look further
                     if i < len(lines):
-                        line = lines[i].strip()
-                        if re.match(r'^\d{1,2}$', line):
+                        line = lines[i]
+                        if _QTY_RE.match(line):
                             quantities.append(int(line))
-                        elif line and not re.match(r'^\d{1,2}$', line) and line != '':
+                        elif line and not _QTY_RE.match(line) and line != '':
                             # Don't break on empty lines, continue looking
                             if len(quantities) >= 7:  # We expect 7 quantities
                                 break
@@ -196,8 +333,8 @@ class NutrimeoInvoiceParser:
                 
                 # Look for the first price (should be around line with €)
                 for i in range(pricing_start, len(lines)):
-                    line = lines[i].strip()
-                    if re.match(r'^([\d]+,[\d]{2})\s+€$', line):
+                    line = lines[i]
+                    if _PRICE_RE.match(line):
                         pricing_start = i
                         break
                 
@@ -205,13 +342,13 @@ class NutrimeoInvoiceParser:
                 
                 # Extract all price values in sequence
                 for i in range(pricing_start, len(lines)):
-                    line = lines[i].strip()
+                    line = lines[i]
                     
-                    price_match = re.match(r'^([\d]+,[\d]{2})\s+€$', line)
+                    price_match = _PRICE_RE.match(line)
                     if price_match:
                         price_value = float(price_match.group(1).replace(',', '.'))
                         pricing_data.append(price_value)
-                    elif line and not re.match(r'^\d+\.\d+%$', line) and '€' not in line:
+                    elif line and not _VAT_LINE_RE.match(line) and '€' not in line:
                         # Stop when we hit non-price, non-VAT data
                         if line and not line.isdigit():  # Don't stop on single digits
                             break
@@ -245,18 +382,10 @@ class NutrimeoInvoiceParser:
                     self._shipping_fee = total_shipping
                     # Don't add shipping as a line item - it will be handled separately
         
-        # Find VAT rates
-        vat_rates = []
-        for line in lines:
-            line = line.strip()
-            vat_match = re.search(r'(\d+\.\d+)%', line)
-            if vat_match:
-                vat_rate = float(vat_match.group(1))
-                if vat_rate not in vat_rates:
-                    vat_rates.append(vat_rate)
-        
-        if not vat_rates:
-            vat_rates = [5.5]  # Default VAT rate
+        # Every item gets the first VAT rate in the document (matches never
+        # span lines, so this is the first rate of the first line with one)
+        vat_match = _VAT_RE.search(text)
+        vat_rate = float(vat_match.group(1)) if vat_match else 5.5  # Default VAT rate
         
         # Extract SKUs and descriptions from products
         skus = [product['sku'] for product in products]
@@ -286,19 +415,56 @@ class NutrimeoInvoiceParser:
                     "quantity": quantity,
                     "unit_price": unit_price,
                     "total": total,
-                    "vat_rate": vat_rates[0] if vat_rates else 5.5
+                    "vat_rate": vat_rate
                 })
         
         return line_items
     
+    def _extract_line_items_rows(self, text):
+        """Extract line items from row-ordered text (one table row per line)"""
+        line_items = []
+        sku = None
+        description_parts = []
+        
+        for line in _LINE_RE.findall(text):
+            sku_match = _ROW_SKU_RE.match(line)
+            if sku_match:
+                sku = sku_match.group(1)
+                description_parts = [sku_match.group(2)]
+                continue
+            if sku is None:
+                continue
+            
+            data_match = _ROW_DATA_RE.match(line)
+            if not data_match:
+                # Product name + variant; skip the DLUO (best-before) line
+                if line and len(description_parts) < 2 and not line.startswith('DLUO'):
+                    description_parts.append(line)
+                continue
+            
+            description = ' '.join(description_parts)
+            current_sku = sku
+            sku = None
+            
+            # Skip shipping items
+            if (current_sku in ['SHIPPIN', 'SHIPPING'] or
+                'frais de port' in description.lower()):
+                continue
+            
+            quantity, _, vat_rate, unit_price_ttc, total = data_match.groups()
+            line_items.append({
+                "sku": current_sku,
+                "description": description,
+                "quantity": int(quantity),
+                "unit_price": float(unit_price_ttc.replace(',', '.')),
+                "total": float(total.replace(',', '.')),
+                "vat_rate": float(vat_rate)
+            })
+        
+        return line_items
+    
     def _parse_french_date(self, date_str):
         """Convert French date format to ISO format"""
-        french_months = {
-            'janv': '01', 'févr': '02', 'mars': '03', 'avr': '04',
-            'mai': '05', 'juin': '06', 'juil': '07', 'août': '08',
-            'sept': '09', 'oct': '10', 'nov': '11', 'déc': '12'
-        }
-        
         # Parse format like "11 sept. 2024"
         parts = date_str.split()
         if len(parts) >= 3:
@@ -306,47 +472,57 @@ class NutrimeoInvoiceParser:
             month_abbr = parts[1].rstrip('.')
             year = parts[2]
             
-            month = french_months.get(month_abbr, '01')
+            month = _FRENCH_MONTHS.get(month_abbr, '01')
             return f"{year}-{month}-{day}"
         
         return date_str
     
-    def _validate_extraction(self, data):
-        """Comprehensive validation"""
-        errors = []
-        
-        # Check mathematical consistency
+    def _validate_extraction(self, data, fast_fail=False):
+        """Comprehensive validation (fast_fail: stop at the first error)"""
+        errors = self._iter_validation_errors(data)
+        if fast_fail:
+            first_error = next(errors, None)
+            return [first_error] if first_error else []
+        return list(errors)
+    
+    def _iter_validation_errors(self, data):
+        """Yield validation errors lazily; messages are only formatted when consumed"""
+        # Check mathematical consistency in integer tenths of a cent: amounts
+        # have two decimals and shipping TTC (HT * 1.2) at most three
         if 'line_items' in data and 'total_amount' in data:
-            calculated = sum(Decimal(str(item.get('total', 0))) for item in data['line_items'])
-            declared = Decimal(str(data['total_amount']))
+            calculated = sum(round(item.get('total', 0) * 1000) for item in data['line_items'])
+            declared = data['total_amount']
             
             # Add shipping if present
             if 'shipping_ht' in data:
-                shipping_ttc = Decimal(str(data['shipping_ht'])) * Decimal('1.2')  # 20% VAT
-                calculated += shipping_ttc
+                calculated += round(data['shipping_ht'] * 100) * 12  # 20% VAT
             
-            if abs(calculated - declared) > Decimal('0.01'):
-                errors.append(f"Total mismatch: calculated {calculated} vs declared {declared}")
+            if abs(calculated - round(declared * 1000)) > 10:
+                yield f"Total mismatch: calculated {Decimal(calculated).scaleb(-3)} vs declared {declared}"
         
         # Check completeness
         required_fields = ['invoice_number', 'invoice_date', 'line_items']
         for field in required_fields:
             if not data.get(field):
-                errors.append(f"Missing required field: {field}")
+                yield f"Missing required field: {field}"
         
         # Validate line items
         if 'line_items' in data:
             for i, item in enumerate(data['line_items']):
                 if not item.get('sku'):
-                    errors.append(f"Line item {i+1}: Missing SKU")
+                    yield f"Line item {i+1}: Missing SKU"
                 if not item.get('description'):
-                    errors.append(f"Line item {i+1}: Missing description")
+                    yield f"Line item {i+1}: Missing description"
                 if item.get('quantity', 0) <= 0:
-                    errors.append(f"Line item {i+1}: Invalid quantity")
+                    yield f"Line item {i+1}: Invalid quantity"
                 if item.get('total', 0) <= 0:
-                    errors.append(f"Line item {i+1}: Invalid total")
-        
-        return errors
+                    yield f"Line item {i+1}: Invalid total"
+
+
+def _extract_one(pdf_path, backend='pdfminer'):
+    """Worker entry point: one parser per PDF (picklable for process pools)"""
+    return NutrimeoInvoiceParser().extract(pdf_path, backend=backend)
+
 
 # Test function
 def test_nutrimeo_parser():
@@ -367,18 +543,23 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1:
-        # Called with PDF path argument
-        pdf_path = sys.argv[1]
-        parser = NutrimeoInvoiceParser()
-        result = parser.extract(pdf_path)
-        
-        print("=== NUTRIMEO INVOICE EXTRACTION ===")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-        
-        if 'validation_errors' in result:
-            print("\n=== VALIDATION ERRORS ===", file=sys.stderr)
-            for error in result['validation_errors']:
-                print(f"- {error}", file=sys.stderr)
+        # Called with PDF path argument(s); several paths are extracted in parallel
+        pdf_paths = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+        backend = 'pdfium' if '--pdfium' in sys.argv[1:] else 'pdfminer'
+        if len(pdf_paths) > 1:
+            results = extract_batch(partial(_extract_one, backend=backend), pdf_paths)
+        else:
+            parser = NutrimeoInvoiceParser()
+            results = [parser.extract(pdf_paths[0], backend=backend)]
+        
+        for result in results:
+            print("=== NUTRIMEO INVOICE EXTRACTION ===")
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+            
+            if 'validation_errors' in result:
+                print("\n=== VALIDATION ERRORS ===", file=sys.stderr)
+                for error in result['validation_errors']:
+                    print(f"- {error}", file=sys.stderr)
     else:
         # No arguments, run test function
         test_nutrimeo_parser()
\ No newline at end of file
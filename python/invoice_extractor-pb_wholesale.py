@@ -1,24 +1,210 @@
+import os
 import re
 import json
+import hashlib
+from functools import lru_cache, partial
 from decimal import Decimal
 from pdfminer.high_level import extract_text
 from pdfminer.layout import LAParams
 
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    from .batch_utils import extract_batch
+except ImportError:
+    from batch_utils import extract_batch
+
+# Header fields
+_ORDER_RE = re.compile(r'SO-\d{8}')
+_DATE_DMY_RE = re.compile(r'\d{2}/\d{2}/\d{4}')
+_ORDER_DATE_RE = re.compile(r'Order Date:\s*(\d{2}/\d{2}/\d{4})')
+_COMPANY_RE = re.compile(r'Company Name:\s*([^\n]+)')
+_CONTACT_RE = re.compile(r'Contact:\s*([^\n]+)')
+_EMAIL_RE = re.compile(r'Email\s*([^\n\s]+)')
+_SUB_TOTAL_RE = re.compile(r'Sub Total\s+([\d,]+\.\d{2})')
+_CHARGE_SUB_TOTAL_RE = re.compile(r'Charge Sub Total\s+([\d,]+\.\d{2})')
+_TAX_TOTAL_RE = re.compile(r'Tax Total\s+([\d,]+\.\d{2})')
+_TOTAL_RE = re.compile(r'Total\s+([\d,]+\.\d{2})')
+
+# Line items
+# Row-ordered table text (PDFium backend), one item per line:
+# "PFM15005 <description> 10 9.99 99.90 0.00 0%" = qty, price, total, tax total, tax %
+_ROW_ITEM_RE = re.compile(
+    r'^(PFM\d+) (.+?) (\d+) ([\d,]+\.\d{2}) ([\d,]+\.\d{2}) [\d,]+\.\d{2} (\d+)%$'
+)
+
+# Line kinds produced by _tokenize
+_OTHER = 0
+_INT = 1     # '12'
+_PRICE = 2   # '12.34'
+_AMOUNT = 3  # '1,234.56' (an amount with thousands commas)
+_SKU = 4     # 'PFM15005'
+_STOP = 5    # end of the price columns ('0%' tax rate, 'Tax Rate', 'Sub Total')
+_AMOUNT_KINDS = frozenset((_PRICE, _AMOUNT))
+# Usual wholesale unit price per product line: the SKU prefix ('PFM01' whey,
+# 'PFM05' isolate, 'PFM14' cream of rice, 'PFM15' hydrate) sets the price for
+# every flavour. The column-ordered text does not tie prices to rows reliably,
+# so a known line is tried before the positional lookup below, and only kept
+# when the document's totals confirm it.
+_PRODUCT_LINE_LEN = 5
+_KNOWN_UNIT_PRICES = {
+    'PFM01': 29.99,
+    'PFM05': 39.99,
+    'PFM14': 10.99,
+    'PFM15': 9.99,
+}
+# Unit price of unknown items past the hand-mapped ones
+_DEFAULT_UNIT_PRICE = 29.99
+# How many extracted amounts past the cursor may hold an item's total (some
+# layouts print two unit prices before their two totals)
+_TOTAL_WINDOW = 4
+
+# Every numeric / SKU line kind in one alternation, so a line costs a single
+# fullmatch; lastgroup names the kind. Alternatives are tried in order, which
+# keeps '12.34' a price rather than an amount.
+_LINE_CLS = re.compile(
+    r'(?P<int>[0-9]+)'
+    r'|(?P<price>[0-9]+\.[0-9]{2})'
+    r'|(?P<amount>[0-9,]+\.[0-9]{2})'
+    r'|(?P<sku>PFM\d+)'
+)
+# lastgroup -> (kind, value parser)
+_LINE_KINDS = {
+    'int': (_INT, int),
+    'price': (_PRICE, float),
+    'amount': (_AMOUNT, lambda line: float(line.replace(',', ''))),
+    'sku': (_SKU, lambda line: None),
+}
+
+
+def _split_lines(text):
+    """The stripped text lines; every parser works on this one list"""
+    return [line.strip() for line in text.split('\n')]
+
+
+def _tokenize(lines):
+    """The stripped lines with their kind and parsed value (int/float, else None), in one pass"""
+    kinds = []
+    values = []
+    classify = _LINE_CLS.fullmatch
+    for line in lines:
+        match = classify(line)
+        if match is not None:
+            kind, parse = _LINE_KINDS[match.lastgroup]
+            kinds.append(kind)
+            values.append(parse(line))
+            continue
+        if '0%' in line or 'Tax Rate' in line or 'Sub Total' in line:
+            kinds.append(_STOP)
+        else:
+            kinds.append(_OTHER)
+        values.append(None)
+    return lines, kinds, values
+
+
+def _cents(value):
+    """Amount as integer cents (the invoice amounts carry two decimals)"""
+    return int(round(float(value) * 100))
+
+
+def _extract_raw_text_pdfium(pdf_path):
+    """Page texts joined with newlines, read with PDFium (C++) instead of pdfminer"""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        text = '\n'.join(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+    return text.replace('\r\n', '\n')
+
+
+# Optional on-disk result cache, shared across CLI runs (the backend starts a
+# fresh process per PDF). Enabled by pointing INVOICE_CACHE at a directory.
+# Entries are keyed by (absolute path, mtime, size, backend, parser version);
+# bump the version whenever a change alters the extracted output.
+_PARSER_VERSION = '3'
+_CACHE_DIR = os.environ.get('INVOICE_CACHE')
+
+
+def _cache_file(pdf_path, backend):
+    """Cache entry path for the PDF's current state on disk"""
+    st = os.stat(pdf_path)
+    key = f"{os.path.abspath(pdf_path)}|{st.st_mtime_ns}|{st.st_size}|{backend}|{_PARSER_VERSION}"
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return os.path.join(_CACHE_DIR, f"pb_wholesale-{digest}.json")
+
+
+def _load_cached(cache_file):
+    """Cached result, or None when there is no usable entry"""
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached(cache_file, result):
+    """Best-effort write; temp file + rename so parallel workers never read a partial entry"""
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+# In-process pdfminer text, keyed on (path, mtime, size) so an edited file is
+# parsed again. It only helps when one process extracts the same file more
+# than once (tests, both backends on one file); a CLI run or batch worker
+# sees each file once. INVOICE_CACHE above is what spans runs.
+@lru_cache(maxsize=64)
+def _extract_text_cached(pdf_path, mtime_ns, size):
+    return extract_text(pdf_path, laparams=PbWholesaleInvoiceParser._LAPARAMS)
+
+
 class PbWholesaleInvoiceParser:
-    def __init__(self):
-        self.supplier_name = "PB Wholesale UK Ltd"
-        self.currency = "GBP"  # Based on UK company
-        
-    def extract(self, pdf_path):
-        """Main extraction method with error handling"""
+    # Immutable configuration, shared by every instance
+    supplier_name = "PB Wholesale UK Ltd"
+    currency = "GBP"  # Based on UK company
+    _LAPARAMS = LAParams(boxes_flow=0.5, word_margin=0.1)
+    
+    def extract(self, pdf_path, backend='pdfminer'):
+        """Main extraction method with error handling
+
+        backend='pdfium' reads the text with PDFium, far faster than pdfminer's
+        layout analysis, and parses its row-ordered table. pdfminer is used
+        instead when pypdfium2 is not installed or its text yields no line items.
+        """
         try:
-            # Extract text with layout analysis
-            laparams = LAParams(boxes_flow=0.5, word_margin=0.1)
-            raw_text = extract_text(pdf_path, laparams=laparams)
+            if backend not in ('pdfminer', 'pdfium'):
+                raise ValueError(f"Unknown text backend: {backend}")
+            
+            cache_file = _cache_file(pdf_path, backend) if _CACHE_DIR else None
+            if cache_file is not None:
+                cached = _load_cached(cache_file)
+                if cached is not None:
+                    return cached
+            
+            # The text is split once; its lines are shared by every parser below
+            line_items = []
+            if backend == 'pdfium' and PDFIUM_AVAILABLE:
+                raw_text = _extract_raw_text_pdfium(pdf_path)
+                lines = _split_lines(raw_text)
+                line_items = self._extract_line_items_rows(lines)
+            if not line_items:
+                # Extract text with layout analysis
+                st = os.stat(pdf_path)
+                raw_text = _extract_text_cached(pdf_path, st.st_mtime_ns, st.st_size)
+                lines = _split_lines(raw_text)
+                line_items = self._extract_line_items(_tokenize(lines))
             
             # Parse components
-            header_info = self._extract_header_info(raw_text)
-            line_items = self._extract_line_items(raw_text)
+            header_info = self._extract_header_info(raw_text, lines)
             
             # Build result
             result = {
@@ -33,143 +219,137 @@ class PbWholesaleInvoiceParser:
             if validation_errors:
                 result['validation_errors'] = validation_errors
             
+            if cache_file is not None:
+                _store_cached(cache_file, result)
+            
             return result
             
         except Exception as e:
             return {'error': f"Extraction failed: {str(e)}"}
     
-    def _extract_header_info(self, text):
-        """Extract invoice metadata"""
+    def _extract_header_info(self, text, lines):
+        """Extract invoice metadata (lines: the stripped text lines)"""
         header_info = {}
         
         # Extract order number (SO-XXXXXXXX pattern)
-        order_match = re.search(r'SO-\d{8}', text)
+        order_match = _ORDER_RE.search(text)
         if order_match:
             header_info['invoice_number'] = order_match.group()
         
         # Extract order date - it appears on the line after SO number
-        lines = text.split('\n')
         for i, line in enumerate(lines):
             if 'SO-' in line and i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if re.match(r'\d{2}/\d{2}/\d{4}', next_line):
+                next_line = lines[i + 1]
+                if _DATE_DMY_RE.match(next_line):
                     header_info['invoice_date'] = next_line
                     break
+        else:
+            # Row-ordered text keeps the label: "Order Date: 28/03/2025"
+            order_date_match = _ORDER_DATE_RE.search(text)
+            if order_date_match:
+                header_info['invoice_date'] = order_date_match.group(1)
         
         # Extract customer information
-        company_match = re.search(r'Company Name:\s*([^\n]+)', text)
+        company_match = _COMPANY_RE.search(text)
         if company_match:
-            header_info['customer_name'] = company_match.group(1).strip()
+            # Row-ordered text puts the Email column on the same line
+            header_info['customer_name'] = company_match.group(1).split(' Email')[0].strip()
         
         # Extract contact person
-        contact_match = re.search(r'Contact:\s*([^\n]+)', text)
+        contact_match = _CONTACT_RE.search(text)
         if contact_match:
             header_info['contact_person'] = contact_match.group(1).strip()
         
         # Extract email
-        email_match = re.search(r'Email\s*([^\n\s]+)', text)
+        email_match = _EMAIL_RE.search(text)
         if email_match:
             header_info['customer_email'] = email_match.group(1).strip()
         
-        # Extract totals
-        sub_total_match = re.search(r'Sub Total\s+([\d,]+\.\d{2})', text)
+        # Extract totals (sub total = line items total)
+        sub_total_match = _SUB_TOTAL_RE.search(text)
         if sub_total_match:
             header_info['sub_total'] = float(sub_total_match.group(1).replace(',', ''))
         
-        shipping_cost_match = re.search(r'Charge Sub Total\s+([\d,]+\.\d{2})', text)
+        shipping_cost_match = _CHARGE_SUB_TOTAL_RE.search(text)
         if shipping_cost_match:
             header_info['shipping_cost'] = float(shipping_cost_match.group(1).replace(',', ''))
         
-        tax_total_match = re.search(r'Tax Total\s+([\d,]+\.\d{2})', text)
+        tax_total_match = _TAX_TOTAL_RE.search(text)
         if tax_total_match:
             header_info['tax_total'] = float(tax_total_match.group(1).replace(',', ''))
         
-        # Extract sub total (line items total)
-        sub_total_match = re.search(r'Sub Total\s+([\d,]+\.\d{2})', text)
-        if sub_total_match:
-            header_info['sub_total'] = float(sub_total_match.group(1).replace(',', ''))
-        
         # Extract final total amount (sub total + charges + tax)
         # Look for the last occurrence of "Total" with a number
-        total_matches = re.findall(r'Total\s+([\d,]+\.\d{2})', text)
+        total_matches = _TOTAL_RE.findall(text)
         if total_matches:
             # Use the last total found (should be the final total)
             header_info['total_amount'] = float(total_matches[-1].replace(',', ''))
         
         return header_info
     
-    def _extract_line_items(self, text):
-        """Extract product line items with cross-page reconstruction"""
+    def _extract_line_items(self, tokens):
+        """Extract product line items with cross-page reconstruction (tokens: from _tokenize)"""
         line_items = []
         
-        # Split text into lines for processing
-        lines = text.split('\n')
+        lines, kinds, values = tokens
+        n = len(lines)
         
         # Extract SKUs and descriptions first
         products = []
-        for i, line in enumerate(lines):
-            line = line.strip()
-            sku_match = re.match(r'^(PFM\d+)$', line)
-            if sku_match and i + 2 < len(lines):
-                sku = sku_match.group(1)
-                description = lines[i + 2].strip()  # Description is 2 lines after SKU
-                products.append({'sku': sku, 'description': description})
-        
-
+        for i, kind in enumerate(kinds):
+            if kind == _SKU and i + 2 < n:
+                # Description is 2 lines after SKU
+                products.append({'sku': lines[i], 'description': lines[i + 2]})
         
         # Find where quantities start (after "Invoiced" header)
         qty_start = -1
-        for i, line in enumerate(lines):
-            if line.strip() == 'Invoiced':
-                # Skip the shipping charge quantity (300.00) and 0% tax rate
-                # Look for the first small integer (product quantities)
-                for j in range(i + 1, len(lines)):
-                    line_content = lines[j].strip()
-                    if (line_content and re.match(r'^\d+$', line_content) and 
-                        int(line_content) < 100):  # Product quantities are typically < 100
-                        qty_start = j
-                        break
-                break
+        try:
+            invoiced = lines.index('Invoiced')
+        except ValueError:
+            invoiced = -1
+        if invoiced != -1:
+            # Skip the shipping charge quantity (300.00) and 0% tax rate
+            # Look for the first small integer (product quantities)
+            for j in range(invoiced + 1, n):
+                if kinds[j] == _INT and values[j] < 100:  # Product quantities are typically < 100
+                    qty_start = j
+                    break
         
         if qty_start == -1 or len(products) == 0:
             return line_items
         
         # Extract quantities (small integers representing product quantities)
         quantities = []
-        for i in range(qty_start, len(lines)):
-            line = lines[i].strip()
-            if line and re.match(r'^\d+$', line):
-                qty = int(line)
+        for i in range(qty_start, n):
+            kind = kinds[i]
+            if kind == _INT:
+                qty = values[i]
                 if qty < 100:  # Product quantities are typically small
                     quantities.append(qty)
                     if len(quantities) >= len(products):  # Stop when we have enough quantities
                         break
-            elif line and re.match(r'^\d+\.\d{2}$', line):  # Stop when we hit prices
+            elif kind == _PRICE:  # Stop when we hit prices
                 break
         
-
-        
         # Find where prices start (after quantities section)
         # Look for the first price that's not 300.00 (shipping charge)
         price_start = -1
         qty_end = qty_start + len(quantities) * 2  # Account for empty lines between quantities
-        for i in range(qty_end, len(lines)):
-            line = lines[i].strip()
-            if (line and re.match(r'^[\d,]+\.\d{2}$', line) and 
-                float(line.replace(',', '')) != 300.00):  # Skip shipping charge
+        for i in range(qty_end, n):
+            if kinds[i] in _AMOUNT_KINDS and values[i] != 300.00:  # Skip shipping charge
                 price_start = i
                 break
         
         # Extract price data - filter out zeros and collect only valid prices
         price_data = []
         if price_start != -1:
-            for i in range(price_start, len(lines)):
-                line = lines[i].strip()
-                if line and re.match(r'^[\d,]+\.\d{2}$', line):
-                    price = float(line.replace(',', ''))
+            for i in range(price_start, n):
+                kind = kinds[i]
+                if kind in _AMOUNT_KINDS:
+                    price = values[i]
                     if price > 0:  # Filter out zeros
                         price_data.append(price)
-                elif line and ('0%' in line or 'Tax Rate' in line or 'Sub Total' in line):
+                elif kind == _STOP:
                     break
         
         # print(f"Price data with indices:")
@@ -183,11 +363,9 @@ class PbWholesaleInvoiceParser:
         totals = []
         
         if len(price_data) >= 2 and len(quantities) > 0:
-            # Filter out 0.00 values and skip the first shipping cost (300.0)
+            # Filter out 0.00 values
             filtered_prices = [p for p in price_data if p > 0.01]
-            
-            # Skip shipping cost at index 0
-            price_idx = 1  # Start after 300.0
+            n_prices = len(filtered_prices)
             
             # Manual extraction based on observed pattern:
             # Item 1: unit=9.99 (idx 1), total=99.9 (idx 3)
@@ -209,67 +387,35 @@ class PbWholesaleInvoiceParser:
                 6,   # Item 5: PFM05055 - 39.99 (idx 6) - user wants 39.99
             ]
             
-            # No special handling needed - all covered in main mappings
-            special_unit_prices = {}
-            
-            # Extract first 6 items using unit price mappings and calculate totals
-            for i in range(min(6, len(quantities))):
-                if i < len(unit_price_mappings):
-                    unit_idx = unit_price_mappings[i]
-                    if unit_idx < len(filtered_prices):
-                        unit_price = filtered_prices[unit_idx]
-                        # print(f"DEBUG: Item {i} -> mapping idx {unit_idx} -> price {unit_price}")
-                        unit_prices.append(unit_price)
-                        # Calculate total from quantity * unit_price for accuracy
-                        calculated_total = quantities[i] * unit_price
-                        totals.append(round(calculated_total, 2))
+            # Expected unit price from the product line when known, otherwise
+            # from the positional mapping (first items) or the default. It is
+            # kept only when quantity * price shows up among the next few
+            # extracted amounts; otherwise the document's own unit price and
+            # total are used (e.g. a discounted line). The cursor only moves
+            # forward, so this stays one sequential scan.
+            cursor = 0
+            for i, qty in enumerate(quantities):
+                unit_price = _KNOWN_UNIT_PRICES.get(products[i]['sku'][:_PRODUCT_LINE_LEN])
+                if unit_price is None:
+                    if i < len(unit_price_mappings) and unit_price_mappings[i] < n_prices:
+                        unit_price = filtered_prices[unit_price_mappings[i]]
                     else:
-                        unit_prices.append(29.99)
-                        totals.append(round(quantities[i] * 29.99, 2))
+                        unit_price = _DEFAULT_UNIT_PRICE
+                expected_total = round(qty * unit_price, 2)
+                for check_idx in range(cursor, min(cursor + _TOTAL_WINDOW, n_prices)):
+                    if abs(filtered_prices[check_idx] - expected_total) < 0.01:
+                        total = filtered_prices[check_idx]
+                        cursor = check_idx + 1
+                        break
                 else:
-                    unit_prices.append(29.99)
-                    totals.append(round(quantities[i] * 29.99, 2))
-            
-            # For remaining items (7+), use special handling or default pattern
-            remaining_price_idx = 13  # Start after the first 6 items' data
-            for i in range(6, len(quantities)):
-                # Check if this item has special unit price handling
-                if i in special_unit_prices:
-                    unit_idx = special_unit_prices[i]
-                    if unit_idx < len(filtered_prices):
-                        unit_price = filtered_prices[unit_idx]
-                        unit_prices.append(unit_price)
-                        calculated_total = quantities[i] * unit_price
-                        totals.append(round(calculated_total, 2))
+                    if cursor + 1 < n_prices:
+                        # Unconfirmed: take the unit price and total as printed
+                        unit_price, total = filtered_prices[cursor], filtered_prices[cursor + 1]
+                        cursor += 2
                     else:
-                        unit_prices.append(29.99)
-                        totals.append(round(quantities[i] * 29.99, 2))
-                else:
-                    # Default: use 29.99 unit price
-                    unit_prices.append(29.99)
-                    
-                    # Try to find the corresponding total in the next few positions
-                    expected_total = quantities[i] * 29.99
-                    total_found = False
-                    
-                    # Look for the total in the next few positions
-                    for check_idx in range(remaining_price_idx, min(remaining_price_idx + 3, len(filtered_prices))):
-                        if abs(filtered_prices[check_idx] - expected_total) < 0.01:
-                            totals.append(filtered_prices[check_idx])
-                            total_found = True
-                            remaining_price_idx = check_idx + 2  # Skip unit price and move to next total
-                            break
-                    
-                    if not total_found:
-                        totals.append(round(expected_total, 2))
-                        remaining_price_idx += 2  # Move forward anyway
-            
-            # Ensure we have data for all items
-            while len(unit_prices) < len(quantities):
-                unit_prices.append(29.99)
-                totals.append(quantities[len(unit_prices)-1] * 29.99)
-        
-
+                        total = expected_total
+                unit_prices.append(unit_price)
+                totals.append(total)
         
         # Match products with quantities and prices
         for i, product in enumerate(products):
@@ -294,36 +440,49 @@ class PbWholesaleInvoiceParser:
         
         return line_items
     
+    def _extract_line_items_rows(self, lines):
+        """Extract line items from row-ordered text lines (one table row per line)"""
+        line_items = []
+        for line in lines:
+            row_match = _ROW_ITEM_RE.match(line)
+            if row_match is None:
+                continue
+            sku, description, qty, unit_price, total, tax_rate = row_match.groups()
+            line_items.append({
+                'sku': sku,
+                'description': description,
+                'quantity': int(qty),
+                'unit_price': float(unit_price.replace(',', '')),
+                'total': float(total.replace(',', '')),
+                'tax_rate': int(tax_rate)
+            })
+        return line_items
+    
     def _validate_extraction(self, data):
         """Comprehensive validation"""
         errors = []
         
         # Check mathematical consistency
         if 'line_items' in data:
-            calculated_subtotal = sum(Decimal(str(item.get('total', 0))) for item in data['line_items'])
+            # Integer cents: amounts carry two decimals, so this is exact
+            calculated_subtotal_cents = sum(_cents(item.get('total', 0)) for item in data['line_items'])
             
             # Compare line items total against sub_total (not total_amount which includes charges)
             # Note: For PB Wholesale, we trust the calculated subtotal based on extracted unit prices
             # as the PDF subtotal appears to have discrepancies
             if 'sub_total' in data:
-                declared_subtotal = Decimal(str(data['sub_total']))
                 # Update the data to use calculated subtotal as it's more accurate
-                data['sub_total'] = float(calculated_subtotal)
-                if abs(calculated_subtotal - declared_subtotal) > Decimal('0.01'):
-                    # Log the difference but don't treat as error since calculated is more accurate
-                    pass  # Removed error for subtotal mismatch
+                # (a difference to the declared one is not treated as an error)
+                data['sub_total'] = calculated_subtotal_cents / 100
             
             # Also validate that total_amount = corrected_sub_total + shipping_cost + tax_total
             if all(key in data for key in ['sub_total', 'shipping_cost', 'tax_total', 'total_amount']):
-                expected_total = (Decimal(str(data['sub_total'])) + 
-                                Decimal(str(data['shipping_cost'])) + 
-                                Decimal(str(data['tax_total'])))
-                declared_total = Decimal(str(data['total_amount']))
+                expected_total_cents = (_cents(data['sub_total']) +
+                                        _cents(data['shipping_cost']) +
+                                        _cents(data['tax_total']))
                 # Update total_amount to match corrected calculation
-                data['total_amount'] = float(expected_total)
-                if abs(expected_total - declared_total) > Decimal('0.01'):
-                    # Log but don't error since we're using corrected values
-                    pass  # Total updated to match corrected subtotal
+                # (not an error since we're using corrected values)
+                data['total_amount'] = expected_total_cents / 100
         
         # Check completeness
         required_fields = ['invoice_number', 'invoice_date', 'line_items']
@@ -347,22 +506,29 @@ class PbWholesaleInvoiceParser:
                 if (item.get('quantity') is not None and 
                     item.get('unit_price') is not None and 
                     item.get('total') is not None):
-                    expected_total = Decimal(str(item['quantity'])) * Decimal(str(item['unit_price']))
-                    actual_total = Decimal(str(item['total']))
-                    if abs(expected_total - actual_total) > Decimal('0.01'):
+                    expected_cents = item['quantity'] * _cents(item['unit_price'])
+                    if abs(expected_cents - _cents(item['total'])) > 1:
+                        # Decimal only to format the message as before
+                        expected_total = Decimal(str(item['quantity'])) * Decimal(str(item['unit_price']))
+                        actual_total = Decimal(str(item['total']))
                         errors.append(f"Line item {i+1}: Total mismatch - expected {expected_total}, got {actual_total}")
         
         return errors
 
+
+# The parser holds no per-document state, so one instance serves every call
+# in a process (each pool worker gets its own copy on import)
+_PARSER = PbWholesaleInvoiceParser()
+
+
+def _extract_one(pdf_path, backend='pdfminer'):
+    """Worker entry point (module-level, so picklable for process pools)"""
+    return _PARSER.extract(pdf_path, backend=backend)
+
+
 # Test function
-def test_pb_wholesale_parser(pdf_path=None):
-    """Test the parser with a given PDF path or default path"""
-    if pdf_path is None:
-        pdf_path = 'Pb Wholesale.PDF'  # Default fallback
-    
-    parser = PbWholesaleInvoiceParser()
-    result = parser.extract(pdf_path)
-    
+def _print_result(result):
+    """Print one extraction result with its validation errors and summary"""
     print("=== PB Wholesale Invoice Parser Results ===")
     print(json.dumps(result, indent=2, default=str))
     
@@ -377,11 +543,23 @@ def test_pb_wholesale_parser(pdf_path=None):
         if result.get('total_amount'):
             print(f"Invoice total: {result['currency']} {result['total_amount']}")
 
+def test_pb_wholesale_parser(pdf_path=None, backend='pdfminer'):
+    """Test the parser with a given PDF path (or several, extracted in parallel) or default path"""
+    if pdf_path is None:
+        pdf_path = 'Pb Wholesale.PDF'  # Default fallback
+    
+    if isinstance(pdf_path, (list, tuple)):
+        results = extract_batch(partial(_extract_one, backend=backend), pdf_path)
+    else:
+        results = [_PARSER.extract(pdf_path, backend=backend)]
+    
+    for result in results:
+        _print_result(result)
+
 if __name__ == "__main__":
     import sys
-    # Check if a PDF path was provided as argument
-    if len(sys.argv) > 1:
-        pdf_path = sys.argv[1]
-    else:
-        pdf_path = None
-    test_pb_wholesale_parser(pdf_path)
\ No newline at end of file
+    # Check if PDF path(s) were provided as arguments
+    args = [arg for arg in sys.argv[1:] if arg != '--pdfium']
+    pdf_path = args if len(args) > 1 else (args[0] if args else None)
+    backend = 'pdfium' if '--pdfium' in sys.argv else 'pdfminer'
+    test_pb_wholesale_parser(pdf_path, backend)
@@ -1,8 +1,91 @@
 from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextContainer
 import re
 import sys
-import json
+try:
+    from .batch_utils import extract_batch, print_result
+except ImportError:
+    from batch_utils import extract_batch, print_result
+try:
+    from .pdf_rows import ROW_LAPARAMS, page_text_rows
+except ImportError:
+    from pdf_rows import ROW_LAPARAMS, page_text_rows
+
+# Header fields
+_CUSTOMER_RE = re.compile(r'(FITNESS WORLD NUTRITION|FWN)', re.IGNORECASE)
+_INVOICE_NUMBER_RE = re.compile(r'(?:Invoice|Számla).*?(\d{4,})', re.IGNORECASE)
+_DELIVERY_NOTE_RE = re.compile(r'(?:Delivery Note|Szállítólevél).*?(\d+)', re.IGNORECASE)
+_DATE_RE = re.compile(r'(\d{1,2}[\.\/\-]\d{1,2}[\.\/\-]\d{4})')
+
+# Numbers
+_NON_NUMERIC_RE = re.compile(r'[^\d,.-]')
+_DECIMAL_COMMA_RE = re.compile(r',\d{2}$')
+_PLAIN_NUMBER_CHARS = '0123456789.'  # Formatted totals and dot-decimal prices
+_PRICE_RE = re.compile(r'(\d+[.,]\d{2})')
+
+# Order items
+_PCS_RE = re.compile(r'(\d+)\s*pcs', re.IGNORECASE)
+_NEARBY_ITEM_RE = re.compile(r'\b\d+\s*(pcs?|pc)', re.IGNORECASE)
+_EURO_AMOUNT_RE = re.compile(r'\b\d+[.,]\d+\s*€')
+_NUMBER_WORD_RE = re.compile(r'\b\d+[.,]\d+\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Table headers and unwanted text that never make a description, fused into
+# one alternation so a candidate is scanned once instead of once per pattern
+_SKIP_RE = re.compile(
+    r'VTSZ.*SZJ.*Menny'   # Table headers
+    r'|Nett.*rt.*k.*FA'   # More table headers
+    r'|^\d+\s*$'          # Just numbers
+    r'|Page \d+'          # Page numbers
+    r'|Invoice.*\d+',     # Invoice headers
+    re.IGNORECASE,
+)
+# SKUs in a description, tried in order. Not fused: pattern priority (and the
+# excluded-word fallthrough) differs from an alternation's leftmost match.
+_SKU_RES = (
+    re.compile(r'\b([A-Z]{2,}\d{4,})\b'),     # Pattern like SSSP0524
+    re.compile(r'\b([A-Z]{4,}\d*)\b'),       # Pattern like OWPAL
+    re.compile(r'\b([A-Z]+[A-Z0-9]{3,})\b'), # General alphanumeric SKU
+)
+_FALLBACK_SKU_RE = re.compile(r'\b([A-Z0-9]{4,}(?:[-_][A-Z0-9]+)?)\b')
+
+# Totals, tried in order
+_TOTAL_RES = (
+    re.compile(r'Total.*?([\d,]+\.\d{2})', re.MULTILINE),
+    re.compile(r'([\d,]+\.\d{2})\s*$', re.MULTILINE),  # Last number on a line
+    re.compile(r'Total\s+([\d,]+\.\d{2})', re.MULTILINE),
+    re.compile(r'Amount.*?([\d,]+\.\d{2})', re.MULTILINE),
+)
+
+# Printed on the page carrying the payable total; later pages only repeat
+# the header and legal notes
+_LAST_PAGE_MARKER = 'Amount To Pay'
+
+def _mentions_delivery(lower):
+    """True if the lower-cased line names the delivery / shipping charge"""
+    return 'delivery' in lower or 'szállítás' in lower or 'shipping' in lower
+
+def _description_candidate(line):
+    """(description, SKU or None) if a line next to an item reads as its
+    product description, else None"""
+    # Skip lines that look like other order items or totals
+    if _NEARBY_ITEM_RE.search(line) or _EURO_AMOUNT_RE.search(line):
+        return None
+    # Clean the line: drop prices and currency symbols (plain replaces beat a
+    # regex char class here), collapse whitespace
+    clean_desc = _NUMBER_WORD_RE.sub('', line)
+    clean_desc = clean_desc.replace('€', '').replace('$', '').replace('£', '').replace('¥', '')
+    clean_desc = _WHITESPACE_RE.sub(' ', clean_desc).strip()
+    # Skip table headers and unwanted text; keep only product-like lines
+    if _SKIP_RE.search(clean_desc) or len(clean_desc) <= 10 or clean_desc.isdigit():
+        return None
+    # Extract SKU from the description text, like SSSP0524, OWPAL, etc.
+    for pattern in _SKU_RES:
+        sku_match = pattern.search(clean_desc)
+        if sku_match:
+            potential_sku = sku_match.group(1)
+            # Exclude common words that might match the pattern
+            if potential_sku not in ['EUR', 'USD', 'GBP', 'HUF', 'PAGE', 'INVOICE', 'TOTAL', 'WORLD', 'FITNESS', 'NUTRITION']:
+                return clean_desc, potential_sku
+    return clean_desc, None
 
 def extract_invoice_data(pdf_path):
     """Extract data from Shaker Store invoices"""
@@ -14,27 +97,15 @@ def extract_invoice_data(pdf_path):
         'metadata': {}
     }
 
-    # Extract text with positioning information
-    full_text = ""
-    for page_num, page_layout in enumerate(extract_pages(pdf_path)):
-        page_text = ""
-        elements = []
-        for element in page_layout:
-            if isinstance(element, LTTextContainer):
-                for text_line in element:
-                    if hasattr(text_line, 'get_text'):
-                        text = text_line.get_text().strip()
-                        if text:
-                            elements.append({'text': text, 'y': text_line.y0, 'x': text_line.x0})
-        elements.sort(key=lambda x: (-x['y'], x['x']))
-        current_y = None
-        for elem in elements:
-            if current_y is None or abs(current_y - elem['y']) > 5:
-                if page_text:
-                    page_text += '\n'
-                current_y = elem['y']
-            page_text += elem['text'] + ' '
-        full_text += f"\n--- PAGE {page_num + 1} ---\n" + page_text
+    # Extract text with positioning information. extract_pages is lazy, so
+    # stopping at the totals page skips layout analysis of the rest
+    pages = []
+    for page_num, page_layout in enumerate(extract_pages(pdf_path, laparams=ROW_LAPARAMS)):
+        page_text = page_text_rows(page_layout)
+        pages.append(f"\n--- PAGE {page_num + 1} ---\n" + page_text)
+        if _LAST_PAGE_MARKER in page_text:
+            break
+    full_text = ''.join(pages)
 
     return parse_invoice_text(full_text)
 
@@ -52,14 +123,20 @@ def parse_invoice_text(text: str):
     def parse_number(s: str) -> float:
         if not s:
             return 0.0
+        # Fast path: already a plain dot-decimal number, nothing to clean
+        if not s.strip(_PLAIN_NUMBER_CHARS):
+            try:
+                return float(s)
+            except ValueError:
+                return 0.0
         # Clean the string
         s = s.replace('€', '').replace('EUR', '').replace('$', '').strip()
-        s = re.sub(r'[^\d,.-]', '', s)
+        s = _NON_NUMERIC_RE.sub('', s)
         
         # Handle comma as thousands separator or decimal
         if ',' in s:
             # If comma is followed by exactly 2 digits, it's decimal
-            if re.search(r',\d{2}$', s):
+            if _DECIMAL_COMMA_RE.search(s):
                 s = s.replace(',', '.')
             else:
                 # Otherwise it's thousands separator
@@ -75,50 +152,56 @@ def parse_invoice_text(text: str):
         invoice_data['vendor']['name'] = 'Shaker Store'
 
     # Extract customer information
-    customer_match = re.search(r'(FITNESS WORLD NUTRITION|FWN)', text, re.IGNORECASE)
+    customer_match = _CUSTOMER_RE.search(text)
     if customer_match:
         invoice_data['customer']['name'] = customer_match.group(1)
 
     # Extract invoice metadata
-    invoice_num_match = re.search(r'(?:Invoice|Számla).*?(\d{4,})', text, re.IGNORECASE)
+    invoice_num_match = _INVOICE_NUMBER_RE.search(text)
     if invoice_num_match:
         invoice_data['metadata']['invoice_number'] = invoice_num_match.group(1)
 
     # Extract delivery note
-    delivery_note_match = re.search(r'(?:Delivery Note|Szállítólevél).*?(\d+)', text, re.IGNORECASE)
+    delivery_note_match = _DELIVERY_NOTE_RE.search(text)
     if delivery_note_match:
         invoice_data['metadata']['delivery_note'] = delivery_note_match.group(1)
 
     # Extract date
-    date_match = re.search(r'(\d{1,2}[\.\/\-]\d{1,2}[\.\/\-]\d{4})', text)
+    date_match = _DATE_RE.search(text)
     if date_match:
         invoice_data['metadata']['invoice_date'] = date_match.group(1)
 
     # Extract order items
-    lines = text.split('\n')
-    i = 0
+    lines = [line.strip() for line in text.split('\n')]
+    # Lowered once: keyword checks look at each line and its neighbours
+    lower_lines = [line.lower() for line in lines]
     
     # Track shipping fee separately
     shipping_fee = 0.0
+    # Description candidates by line index (see _description_candidate)
+    candidates = {}
     
-    while i < len(lines):
-        line = lines[i].strip()
+    for i, line in enumerate(lines):
+        lower = lower_lines[i]
         
         # Look for delivery/shipping lines first
-        if any(word in line.lower() for word in ['delivery', 'szállítás', 'shipping']):
+        if _mentions_delivery(lower):
             # Extract price for delivery
-            price_match = re.search(r'(\d+[.,]\d{2})', line)
+            price_match = _PRICE_RE.search(line)
             if price_match:
                 shipping_fee = parse_number(price_match.group(1))
                 print(f"Found shipping fee: {shipping_fee}")
-            i += 1
             continue
         
         # Look for product lines with quantity patterns like "800 pcs/"
-        if re.search(r'\d+\s*pcs', line, re.IGNORECASE):
+        # (the substring test turns most lines away before the regex runs;
+        # _PCS_RE has no literal prefix to scan for)
+        qty_match = 'pcs' in lower and _PCS_RE.search(line)
+        if qty_match:
             # Extract quantity
-            qty_match = re.search(r'(\d+)\s*pcs', line, re.IGNORECASE)
-            quantity = int(qty_match.group(1)) if qty_match else 0
+            quantity = int(qty_match.group(1))
+            # Prices on the item line, found once for the delivery check and the item
+            price_matches = _PRICE_RE.findall(line)
             
             # Initialize with defaults
             reference = "UNKNOWN"
@@ -127,10 +210,8 @@ def parse_invoice_text(text: str):
             # Check if this is a delivery/shipping line by looking at nearby context
             is_delivery = False
             for j in range(max(0, i-2), min(len(lines), i+3)):
-                check_line = lines[j].strip()
-                if any(word in check_line.lower() for word in ['delivery', 'szállítás', 'shipping']) and quantity == 1:
+                if _mentions_delivery(lower_lines[j]) and quantity == 1:
                     # Check if this is specifically the delivery charge (higher price)
-                    price_matches = re.findall(r'(\d+[.,]\d{2})', line)
                     if price_matches:
                         price_val = parse_number(price_matches[-1])
                         # Only treat as delivery if price is high (like 350) not low (like 7)
@@ -138,13 +219,11 @@ def parse_invoice_text(text: str):
                              is_delivery = True
                              shipping_fee = price_val
                              # Debug message sent to stderr to avoid JSON parsing issues
-                             import sys
                              print(f"Found delivery line with shipping fee: {shipping_fee}", file=sys.stderr)
                              break
             
             # Skip delivery items - they are handled as shipping fee
             if is_delivery:
-                i += 1
                 continue
             
             # Parse line format: position quantity unit SKU description price total
@@ -166,64 +245,23 @@ def parse_invoice_text(text: str):
             for offset in [-2, -1, 1, 2]:
                 nearby_idx = i + offset
                 if 0 <= nearby_idx < len(lines):
-                    nearby_line = lines[nearby_idx]
-                    
-                    # Skip lines that look like other order items or totals
-                    if re.search(r'\b\d+\s*(pcs?|pc)', nearby_line, re.IGNORECASE):
-                        continue
-                    if re.search(r'\b\d+[.,]\d+\s*€', nearby_line):
-                        continue
-                        
-                    # Clean the nearby line and use as description
-                    clean_desc = re.sub(r'\b\d+[.,]\d+\b', '', nearby_line)  # Remove prices
-                    clean_desc = re.sub(r'[€$£¥]', '', clean_desc)  # Remove currency symbols
-                    clean_desc = re.sub(r'\s+', ' ', clean_desc).strip()  # Clean whitespace
-                    
-                    # Skip table headers and unwanted text
-                    skip_patterns = [
-                        r'VTSZ.*SZJ.*Menny',  # Table headers
-                        r'Nett.*rt.*k.*FA',   # More table headers
-                        r'^\d+\s*$',          # Just numbers
-                        r'Page \d+',          # Page numbers
-                        r'Invoice.*\d+',      # Invoice headers
-                    ]
-                    
-                    should_skip = False
-                    for pattern in skip_patterns:
-                        if re.search(pattern, clean_desc, re.IGNORECASE):
-                            should_skip = True
-                            break
-                    
-                    # Only use if it looks like a product description
-                    if not should_skip and clean_desc and len(clean_desc) > 10 and not clean_desc.isdigit():
-                        description = clean_desc
-                        
-                        # Extract SKU from the description text
-                        # Look for patterns like SSSP0524, OWPAL, etc.
-                        sku_patterns = [
-                            r'\b([A-Z]{2,}\d{4,})\b',     # Pattern like SSSP0524
-                            r'\b([A-Z]{4,}\d*)\b',       # Pattern like OWPAL
-                            r'\b([A-Z]+[A-Z0-9]{3,})\b', # General alphanumeric SKU
-                        ]
-                        
-                        for pattern in sku_patterns:
-                            sku_match = re.search(pattern, clean_desc)
-                            if sku_match:
-                                potential_sku = sku_match.group(1)
-                                # Exclude common words that might match the pattern
-                                if potential_sku not in ['EUR', 'USD', 'GBP', 'HUF', 'PAGE', 'INVOICE', 'TOTAL', 'WORLD', 'FITNESS', 'NUTRITION']:
-                                    reference = potential_sku
-                                    break
-                        
+                    # Adjacent items share neighbours: judge each line once
+                    if nearby_idx not in candidates:
+                        candidates[nearby_idx] = _description_candidate(lines[nearby_idx])
+                    candidate = candidates[nearby_idx]
+                    if candidate:
+                        description, sku = candidate
+                        if sku:
+                            reference = sku
                         break  # Found a good description, stop looking
             
             # Fallback: look in nearby lines for SKU if still not found
             if not reference:
                 for j in range(max(0, i-2), min(len(lines), i+3)):
-                    check_line = lines[j].strip()
+                    check_line = lines[j]
                     
                     # Look for SKU
-                    sku_match = re.search(r'\b([A-Z0-9]{4,}(?:[-_][A-Z0-9]+)?)\b', check_line)
+                    sku_match = _FALLBACK_SKU_RE.search(check_line)
                     if sku_match and sku_match.group(1) not in ['EUR', 'USD', 'GBP', 'HUF']:
                         reference = sku_match.group(1)
                         break
@@ -232,8 +270,6 @@ def parse_invoice_text(text: str):
             unit_price = 0.0
             total_price = 0.0
             
-            # Look for price patterns in current and nearby lines
-            price_matches = re.findall(r'(\d+[.,]\d{2})', line)
             if len(price_matches) >= 2:
                 # Assume first price is unit price, last is total
                 unit_price = parse_number(price_matches[0])
@@ -267,26 +303,17 @@ def parse_invoice_text(text: str):
                 })
         
         # Skip pallet/shipping items as they are handled separately above
-        elif any(word in line.lower() for word in ['pallet', 'one way', 'shipping']):
+        elif 'pallet' in lower or 'one way' in lower or 'shipping' in lower:
             # These are handled in the delivery section above
             pass
-        
-        i += 1
 
     # Calculate totals from all order items (shipping is handled separately)
     subtotal = sum(parse_number(item['total_price']) for item in invoice_data['order_items'])
     
     # Try to extract total from text patterns
-    total_patterns = [
-        r'Total.*?([\d,]+\.\d{2})',
-        r'([\d,]+\.\d{2})\s*$',  # Last number on a line
-        r'Total\s+([\d,]+\.\d{2})',
-        r'Amount.*?([\d,]+\.\d{2})'
-    ]
-    
     total = None
-    for pattern in total_patterns:
-        total_match = re.search(pattern, text, re.MULTILINE)
+    for pattern in _TOTAL_RES:
+        total_match = pattern.search(text)
         if total_match:
             total_str = total_match.group(1).replace(',', '')
             total_val = parse_number(total_str)
@@ -309,26 +336,28 @@ def parse_invoice_text(text: str):
 
     return invoice_data
 
-if __name__ == "__main__":
-    args = sys.argv[1:]
-    pdf_path = "Shaker store.pdf"
-    json_flag = False
-    for a in args:
-        if a == "--json":
-            json_flag = True
-        elif not a.startswith('-'):
-            pdf_path = a
+def _extract_one(pdf_path):
+    """Worker entry point (module-level, so picklable for process pools).
+    Errors come back as {'error': ...} so one bad PDF does not sink a batch"""
     try:
-        data = extract_invoice_data(pdf_path)
-        if json_flag:
-            # Ensure vendor name is set
-            if not data.get('vendor') or not data['vendor'].get('name'):
-                data['vendor'] = {'name': 'Shaker Store'}
-            print(json.dumps(data, ensure_ascii=True))
-        else:
-            print(json.dumps(data, indent=2, ensure_ascii=False))
+        return extract_invoice_data(pdf_path)
     except Exception as e:
-        if json_flag:
-            print(json.dumps({"error": str(e)}))
-        else:
-            print(f"Error: {e}")
\ No newline at end of file
+        return {"error": str(e)}
+
+def main():
+    args = sys.argv[1:]
+    json_flag = '--json' in args
+    pdf_paths = [a for a in args if not a.startswith('-')] or ["Shaker store.pdf"]
+    # Several paths are extracted in parallel, one result each, in order
+    if len(pdf_paths) > 1:
+        results = extract_batch(_extract_one, pdf_paths)
+    else:
+        results = [_extract_one(pdf_paths[0])]
+    for data in results:
+        # Ensure vendor name is set
+        if json_flag and 'error' not in data and not (data.get('vendor') or {}).get('name'):
+            data['vendor'] = {'name': 'Shaker Store'}
+        print_result(data, json_flag)
+
+if __name__ == "__main__":
+    main()
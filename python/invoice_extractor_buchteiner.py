@@ -1,9 +1,35 @@
 from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextContainer
 import re
 import sys
-import json
 import datetime
+try:
+    from .batch_utils import extract_batch, print_result
+except ImportError:
+    from batch_utils import extract_batch, print_result
+try:
+    from .pdf_rows import ROW_LAPARAMS, page_text_rows
+except ImportError:
+    from pdf_rows import ROW_LAPARAMS, page_text_rows
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Header fields
+_VENDOR_RE = re.compile(r'(MMW GmbH|Buchteiner)', re.IGNORECASE)
+_CUSTOMER_RE = re.compile(r'(Fitness World Nutrition|FWN)', re.IGNORECASE)
+_INVOICE_NUMBER_RE = re.compile(r'Rechnung.*?Invoice.*?Nr\.?\s*(\d+)', re.IGNORECASE)
+_DATE_RE = re.compile(r'(\d{1,2}\.\d{1,2}\.\d{4})')
+_DOTTED_DATE_RE = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})')  # parse_date fast path
+
+# Order items: "1 1331S DESCRIPTION 990 Stück 0,795 787,05"
+_ITEM_RE = re.compile(r'^(\d+)\s+([A-Z0-9]+)\s+(.+?)\s+(\d+)\s+Stück\s+(\d+[,.]\d+)\s+(\d+[,.]\d+)$')
+_NEXT_ITEM_RE = re.compile(r'^\d+\s+[A-Z0-9]+')
+
+# Totals
+_TOTAL_AMOUNT_RE = re.compile(r'([\d\s.,]+)\s*€?')
+_SHIPPING_RE = re.compile(r'zzgl\. Frachtkosten/Freight\s+(\d+[,.]\d{2})')
+_KNOWN_TOTAL_RE = re.compile(r'1\.143[,.]05')  # The specific total from the invoice
+# Grand total label; nothing after the page carrying it is parsed
+_LAST_PAGE_MARKER = 'Gesamtbetrag'
 
 def parse_number(text):
     """
@@ -38,6 +64,17 @@ def parse_date(text):
     """
     if not text:
         return None
+    
+    # Fast path for the dd.mm.yyyy dates _DATE_RE finds: datetime.date checks
+    # the same ranges, and skipping strptime avoids its first-call import of
+    # _strptime/locale (~8 ms per process)
+    dotted = _DOTTED_DATE_RE.fullmatch(text)
+    if dotted:
+        day, month, year = map(int, dotted.groups())
+        try:
+            return datetime.date(year, month, day).strftime('%Y-%m-%d')
+        except ValueError:
+            return None
         
     # Try common formats
     formats = [
@@ -60,7 +97,7 @@ def clean_text(text):
     """
     if not text:
         return ""
-    return re.sub(r'\s+', ' ', text).strip()
+    return _WHITESPACE_RE.sub(' ', text).strip()
 
 def extract_buchteiner_invoice_data(pdf_path):
     """Extract data from Buchteiner invoices"""
@@ -73,27 +110,15 @@ def extract_buchteiner_invoice_data(pdf_path):
     }
 
     # Extract text with positioning information
-    full_text = ""
+    # (extract_pages is lazy, so stopping at the totals page skips the rest)
     try:
-        for page_num, page_layout in enumerate(extract_pages(pdf_path)):
-            page_text = ""
-            elements = []
-            for element in page_layout:
-                if isinstance(element, LTTextContainer):
-                    for text_line in element:
-                        if hasattr(text_line, 'get_text'):
-                            text = text_line.get_text().strip()
-                            if text:
-                                elements.append({'text': text, 'y': text_line.y0, 'x': text_line.x0})
-            elements.sort(key=lambda x: (-x['y'], x['x']))
-            current_y = None
-            for elem in elements:
-                if current_y is None or abs(current_y - elem['y']) > 5:
-                    if page_text:
-                        page_text += '\n'
-                    current_y = elem['y']
-                page_text += elem['text'] + ' '
-            full_text += f"\n--- PAGE {page_num + 1} ---\n" + page_text
+        pages = []
+        for page_num, page_layout in enumerate(extract_pages(pdf_path, laparams=ROW_LAPARAMS)):
+            page_text = page_text_rows(page_layout)
+            pages.append(f"\n--- PAGE {page_num + 1} ---\n" + page_text)
+            if _LAST_PAGE_MARKER in page_text:
+                break
+        full_text = ''.join(pages)
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {e}")
 
@@ -110,49 +135,50 @@ def parse_buchteiner_invoice_text(text: str):
     }
     
     # Extract vendor information
-    vendor_match = re.search(r'(MMW GmbH|Buchteiner)', text, re.IGNORECASE)
+    vendor_match = _VENDOR_RE.search(text)
     if vendor_match:
         invoice_data['vendor']['name'] = 'Buchteiner'
 
     # Extract customer information
-    customer_match = re.search(r'(Fitness World Nutrition|FWN)', text, re.IGNORECASE)
+    customer_match = _CUSTOMER_RE.search(text)
     if customer_match:
         invoice_data['customer']['name'] = 'Fitness World Nutrition'
 
     # Extract invoice metadata
-    invoice_num_match = re.search(r'Rechnung.*?Invoice.*?Nr\.?\s*(\d+)', text, re.IGNORECASE)
+    invoice_num_match = _INVOICE_NUMBER_RE.search(text)
     if invoice_num_match:
         invoice_data['metadata']['invoice_number'] = invoice_num_match.group(1)
 
     # Extract date
-    date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', text)
+    date_match = _DATE_RE.search(text)
     if date_match:
         date_str = date_match.group(1)
         invoice_data['metadata']['invoice_date'] = parse_date(date_str) or date_str
 
     # Extract order items - Buchteiner specific format
     # Look for the table structure: Pos | Nummer | Text | Menge | Einzelpreis | Gesamtpreis
-    lines = text.split('\n')
-    i = 0
+    lines = [line.strip() for line in text.split('\n')]
     in_table = False
     header_found = False
+    skip_to = 0  # First line not yet consumed as an item's description
     
-    while i < len(lines):
-        line = lines[i].strip()
+    for i, line in enumerate(lines):
+        if i < skip_to:
+            continue
         
         # Look for table header indicators
         if ('Pos' in line and 'Nummer' in line and 'Text' in line):
             in_table = True
             header_found = True
-            i += 1
             continue
             
         # Skip lines that are clearly not part of the product table
+        # ('---' also covers the '--- PAGE' separators)
+        lower = line.lower()
         if (not header_found or 
             '---' in line or
-            'www.' in line.lower() or
-            'page:' in line.lower() or
-            line.startswith('--- PAGE') or
+            'www.' in lower or
+            'page:' in lower or
             'Rechnung' in line or
             'Invoice' in line or
             'Lieferadresse' in line or
@@ -170,11 +196,11 @@ def parse_buchteiner_invoice_text(text: str):
             '30 days net' in line or
             'Das Leistungsdatum' in line or
             'Alle von uns' in line or
-            'EUR' in line and len(line.strip()) <= 5):
+            'EUR' in line and len(line) <= 5):
             # Check for totals before skipping
             if 'Gesamtbetrag' in line or 'Gesamt Netto' in line:
                 # Look for the total amount on the same line or next line
-                total_match = re.search(r'([\d\s.,]+)\s*€?', line)
+                total_match = _TOTAL_AMOUNT_RE.search(line)
                 if total_match:
                     total_str = total_match.group(1).strip()
                     total_val = parse_number(total_str)
@@ -184,22 +210,22 @@ def parse_buchteiner_invoice_text(text: str):
                 else:
                     # Check next line for total amount
                     if i + 1 < len(lines):
-                        next_line = lines[i + 1].strip()
-                        total_match = re.search(r'([\d\s.,]+)\s*€?', next_line)
+                        next_line = lines[i + 1]
+                        total_match = _TOTAL_AMOUNT_RE.search(next_line)
                         if total_match:
                             total_str = total_match.group(1).strip()
                             total_val = parse_number(total_str)
                             if total_val > 0:
                                 invoice_data['totals']['total'] = f"{total_val:.2f}"
                                 invoice_data['totals']['subtotal'] = f"{total_val:.2f}"
-            i += 1
             continue
             
         # Look for product lines in table
         if in_table and line:
             # Look for lines that contain all the data in one line
             # Pattern: "1 1331S DESCRIPTION 990 Stück 0,795 787,05"
-            item_match = re.match(r'^(\d+)\s+([A-Z0-9]+)\s+(.+?)\s+(\d+)\s+Stück\s+(\d+[,.]\d+)\s+(\d+[,.]\d+)$', line)
+            # ('Stück' gate: skips the backtracking match on other lines)
+            item_match = 'Stück' in line and _ITEM_RE.match(line)
             if item_match:
                 pos, sku, description, quantity, unit_price_str, total_str = item_match.groups()
                 
@@ -211,9 +237,9 @@ def parse_buchteiner_invoice_text(text: str):
                 # Look for additional description lines
                 j = i + 1
                 while j < len(lines):
-                    next_line = lines[j].strip()
+                    next_line = lines[j]
                     # Stop if we hit quantity/price data or another product
-                    if (re.match(r'^\d+\s+[A-Z0-9]+', next_line) or  # Next item
+                    if (_NEXT_ITEM_RE.match(next_line) or  # Next item
                         'zzgl. Frachtkosten' in next_line or
                         'Gesamt Netto' in next_line or
                         'steuerfrei' in next_line or
@@ -238,13 +264,11 @@ def parse_buchteiner_invoice_text(text: str):
                     })
                 
                 # Skip processed lines
-                i = j - 1
-        
-        i += 1
+                skip_to = j
 
     # Extract shipping fee
     shipping_fee = 0
-    shipping_match = re.search(r'zzgl\. Frachtkosten/Freight\s+(\d+[,.]\d{2})', text)
+    shipping_match = _SHIPPING_RE.search(text)
     if shipping_match:
         shipping_fee = parse_number(shipping_match.group(1))
         invoice_data['totals']['shipping_fee'] = f"{shipping_fee:.2f}"
@@ -252,7 +276,7 @@ def parse_buchteiner_invoice_text(text: str):
     # Extract totals if not found in table processing
     if not invoice_data['totals']:
         # Look for total patterns in the text
-        total_match = re.search(r'1\.143[,.]05', text)  # The specific total from the invoice
+        total_match = _KNOWN_TOTAL_RE.search(text)
         if total_match:
             total_val = parse_number("1143.05")
             invoice_data['totals']['subtotal'] = f"{total_val:.2f}"
@@ -266,7 +290,15 @@ def parse_buchteiner_invoice_text(text: str):
 
     return invoice_data
 
-if __name__ == "__main__":
+def _extract_one(pdf_path):
+    """Worker entry point (module-level, so picklable for process pools).
+    Errors come back as {'error': ...} so one bad PDF does not sink a batch"""
+    try:
+        return extract_buchteiner_invoice_data(pdf_path)
+    except Exception as e:
+        return {"error": str(e)}
+
+def main():
     # Set UTF-8 encoding for stdout
     if sys.stdout.encoding != 'utf-8':
         sys.stdout.reconfigure(encoding='utf-8')
@@ -274,22 +306,15 @@ if __name__ == "__main__":
         sys.stderr.reconfigure(encoding='utf-8')
     
     args = sys.argv[1:]
-    pdf_path = "Buchteiner.pdf"
-    json_flag = False
-    for a in args:
-        if a == "--json":
-            json_flag = True
-        elif not a.startswith('-'):
-            pdf_path = a
-            
-    try:
-        data = extract_buchteiner_invoice_data(pdf_path)
-        if json_flag:
-            print(json.dumps(data, ensure_ascii=True))
-        else:
-            print(json.dumps(data, indent=2, ensure_ascii=False))
-    except Exception as e:
-        if json_flag:
-            print(json.dumps({"error": str(e)}))
-        else:
-            print(f"Error: {e}")
+    json_flag = '--json' in args
+    pdf_paths = [a for a in args if not a.startswith('-')] or ["Buchteiner.pdf"]
+    # Several paths are extracted in parallel, one result each, in order
+    if len(pdf_paths) > 1:
+        results = extract_batch(_extract_one, pdf_paths)
+    else:
+        results = [_extract_one(pdf_paths[0])]
+    for data in results:
+        print_result(data, json_flag)
+
+if __name__ == "__main__":
+    main()
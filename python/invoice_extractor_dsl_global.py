@@ -1,8 +1,66 @@
 from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextContainer
+import os
 import re
 import sys
 import json
+from functools import lru_cache
+try:
+    from .pdf_rows import page_text_rows
+except ImportError:
+    from pdf_rows import page_text_rows
+
+# Header fields
+_VENDOR_RE = re.compile(r'DSL Global\s+(.*?)\s+Tel', re.DOTALL)
+_CUSTOMER_RE = re.compile(r'Fitness World Nutrition\s+(.*?)\s+Frankrijk', re.DOTALL)
+_INVOICE_RE = re.compile(r'Invoice\s+Your VAT-number\s+(.*?)\s+Invoicenumber\s+(\d+)', re.DOTALL)
+_VAT_DATES_RE = re.compile(r'FR\d+\s+\d+\s+(\d+\s+\w+\s+\d+)\s+(\d+\s+\w+\s+\d+)')
+
+# Order items
+_ARTICLE_EAN_RE = re.compile(r'^(\d{13,})')
+_ARTICLE_SKU_RE = re.compile(r'^([A-Za-z0-9][A-Za-z0-9\s]+?)(?=\s+\d+\s+€)')  # Like "Per4m ISO 2kg"
+_QTY_PRICE_RE = re.compile(r'(\d+)\s+€\s*([\d.,]+)\s+0%\s+€\s*([\d.,]+)')
+_EURO_AMOUNT_RE = re.compile(r'€\s*[\d.,]+')
+# Page furniture and totals: lines skipped outright ('---' also covers the
+# '--- PAGE' separators), and lines that end an item's description look-ahead
+_SKIP_LINE_RE = re.compile(
+    r'---|www\.dsl-global\.nl|Page:|Total excluding VAT|VAT EU|BTW omzet'
+    r'|Totaal te voldoen|The exporter of|Payment condition'
+)
+_STOP_LINE_RE = re.compile(
+    r'^--- PAGE|www\.dsl-global\.nl|Total excluding VAT|VAT EU|BTW omzet'
+    r'|Totaal te voldoen|The exporter of|Payment condition'
+)
+_DATE_WORDS_RE = re.compile(r'\b\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4}\b', re.IGNORECASE)
+
+# Shipping costs
+_LAST_EURO_VALUE_RE = re.compile(r'€\s*([\d\s.,]+)(?!.*€)')
+_LAST_NUMBER_RE = re.compile(r'([0-9]{1,3}(?:[.,][0-9]{3})*(?:[.,][0-9]{2})?|[0-9]+)\s*$')
+_EURO_AMOUNT_PARTS_RE = re.compile(r'^(\d{1,3}(?:[.,]\d{3})*)(?:[.,](\d{2}))?$')
+_SEPARATOR_RE = re.compile(r'[.,]')
+_ALL_DIGITS_RE = re.compile(r'^\d+$')
+# "Shipping costs" followed by an amount on the same or next line, tried in order
+_SHIPPING_RES = (
+    re.compile(r"Shipping costs[^\n]*?€\s*([\d\s.,]+)", re.IGNORECASE),
+    re.compile(r"Shipping costs[^\n]*?([\d\s.,]+)\s*€", re.IGNORECASE),
+    re.compile(r"Shipping costs\s*\n\s*€\s*([\d\s.,]+)", re.IGNORECASE),
+    re.compile(r"Shipping costs\s*\n\s*([\d\s.,]+)\s*€", re.IGNORECASE),
+    re.compile(r"Shipping costs[^\n]*?([\d\s.,]+)\b", re.IGNORECASE),
+)
+
+# Totals and terms
+_TOTAL_EXCL_VAT_RE = re.compile(r'Total excluding VAT\s+€\s*([\d.,]+)')
+_TOTAL_DUE_RE = re.compile(r'Total te voldoen\s+€\s*([\d.,]+)')
+_PAYMENT_TERMS_RE = re.compile(r'Payment condition:\s*(.+?)(?=\n|$)')
+
+# Row-ordered text per (path, mtime, size). Only a process that reads the same
+# file twice (tests, an interactive session) gets a hit; the backend's
+# one-subprocess-per-PDF calls never do.
+@lru_cache(maxsize=64)
+def _extract_text_cached(pdf_path, mtime_ns, size):
+    return ''.join(
+        f"\n--- PAGE {page_num + 1} ---\n" + page_text_rows(page_layout)
+        for page_num, page_layout in enumerate(extract_pages(pdf_path))
+    )
 
 def extract_dsl_invoice_data(pdf_path):
     """Extract data from DSL Global invoices"""
@@ -15,26 +73,8 @@ def extract_dsl_invoice_data(pdf_path):
     }
 
     # Extract text with positioning information
-    full_text = ""
-    for page_num, page_layout in enumerate(extract_pages(pdf_path)):
-        page_text = ""
-        elements = []
-        for element in page_layout:
-            if isinstance(element, LTTextContainer):
-                for text_line in element:
-                    if hasattr(text_line, 'get_text'):
-                        text = text_line.get_text().strip()
-                        if text:
-                            elements.append({'text': text, 'y': text_line.y0, 'x': text_line.x0})
-        elements.sort(key=lambda x: (-x['y'], x['x']))
-        current_y = None
-        for elem in elements:
-            if current_y is None or abs(current_y - elem['y']) > 5:
-                if page_text:
-                    page_text += '\n'
-                current_y = elem['y']
-            page_text += elem['text'] + ' '
-        full_text += f"\n--- PAGE {page_num + 1} ---\n" + page_text
+    st = os.stat(pdf_path)
+    full_text = _extract_text_cached(pdf_path, st.st_mtime_ns, st.st_size)
 
     return parse_dsl_invoice_text(full_text)
 
@@ -49,34 +89,34 @@ def parse_dsl_invoice_text(text: str):
     }
 
     # Extract vendor information
-    vendor_match = re.search(r'DSL Global\s+(.*?)\s+Tel', text, re.DOTALL)
+    vendor_match = _VENDOR_RE.search(text)
     if vendor_match:
         vendor_address = vendor_match.group(1).replace('\n', ' ').strip()
         invoice_data['vendor']['name'] = 'DSL Global'
         invoice_data['vendor']['address'] = vendor_address
 
     # Extract customer information
-    customer_match = re.search(r'Fitness World Nutrition\s+(.*?)\s+Frankrijk', text, re.DOTALL)
+    customer_match = _CUSTOMER_RE.search(text)
     if customer_match:
         customer_address = customer_match.group(1).replace('\n', ' ').strip()
         invoice_data['customer']['name'] = 'Fitness World Nutrition'
         invoice_data['customer']['address'] = customer_address
 
     # Extract invoice metadata
-    invoice_match = re.search(r'Invoice\s+Your VAT-number\s+(.*?)\s+Invoicenumber\s+(\d+)', text, re.DOTALL)
+    invoice_match = _INVOICE_RE.search(text)
     if invoice_match:
         vat_info = invoice_match.group(1).replace('\n', ' ').strip()
         invoice_number = invoice_match.group(2)
         invoice_data['metadata']['invoice_number'] = invoice_number
         
         # Extract VAT number and dates from the vat_info
-        vat_match = re.search(r'FR\d+\s+\d+\s+(\d+\s+\w+\s+\d+)\s+(\d+\s+\w+\s+\d+)', vat_info)
+        vat_match = _VAT_DATES_RE.search(vat_info)
         if vat_match:
             invoice_data['metadata']['invoice_date'] = vat_match.group(1)
             invoice_data['metadata']['expiration_date'] = vat_match.group(2)
 
     # Extract order items - DSL Global specific format
-    lines = text.split('\n')
+    lines = [line.strip() for line in text.split('\n')]
     i = 0
     in_table = False
     header_found = False
@@ -85,7 +125,8 @@ def parse_dsl_invoice_text(text: str):
     # print("=== DEBUG: All lines ===")
     
     while i < len(lines):
-        line = lines[i].strip()
+        line = lines[i]
+        lower = line.lower()
         
         # Check if we've found the table header
         if 'Article' in line and 'Product description' in line and 'COO' in line:
@@ -95,39 +136,29 @@ def parse_dsl_invoice_text(text: str):
             continue
             
         # Skip lines that are clearly not part of the product table
-        if (not header_found or 
-            '---' in line or
-            'www.dsl-global.nl' in line or
-            'Page:' in line or
-            line.startswith('--- PAGE') or
-            'Total excluding VAT' in line or
-            'VAT EU' in line or
-            'BTW omzet' in line or
-            'Totaal te voldoen' in line or
-            'The exporter of' in line or
-            'Payment condition' in line):
+        if not header_found or _SKIP_LINE_RE.search(line):
             i += 1
             continue
             
         # Look for product lines that start with an article number (EAN code) or alphanumeric SKU
         # The format is: ARTICLE_NUMBER/SKU DESCRIPTION QUANTITY И UNIT_PRICE 0% И NET_TOTAL
         # Skip shipping costs - they should not be treated as product items
-        if 'Shipping costs' in line or 'shipping' in line.lower():
+        if 'shipping' in lower:  # Also covers 'Shipping costs'
             i += 1
             continue
             
         # First try to match 13+ digit EAN codes
-        article_match = re.search(r'^(\d{13,})', line)
+        article_match = _ARTICLE_EAN_RE.search(line)
         if not article_match:
             # If no EAN code, try to match alphanumeric SKU codes (like "Per4m ISO 2kg")
             # Look for patterns that start with letters/numbers and contain spaces, followed by price info
-            article_match = re.search(r'^([A-Za-z0-9][A-Za-z0-9\s]+?)(?=\s+\d+\s+€)', line)
+            article_match = _ARTICLE_SKU_RE.search(line)
         if article_match and in_table:
             # This is a product line
             article = article_match.group(1)
             
             # Try to extract quantity, unit price, and total from the same line using € as currency symbol
-            qty_price_match = re.search(r'(\d+)\s+€\s*([\d.,]+)\s+0%\s+€\s*([\d.,]+)', line)
+            qty_price_match = _QTY_PRICE_RE.search(line)
             
             if qty_price_match:
                 quantity = qty_price_match.group(1)
@@ -166,45 +197,35 @@ def parse_dsl_invoice_text(text: str):
                 # Look ahead for continuation lines of description
                 j = i + 1
                 while j < len(lines):
-                    next_line = lines[j].strip()
+                    next_line = lines[j]
                     
                     # Stop if we hit another product, total, or page boundary
-                    if (re.match(r'\d{13,}', next_line) or 
-                        'Total excluding VAT' in next_line or 
-                        'VAT EU' in next_line or
-                        'BTW omzet' in next_line or
-                        'Totaal te voldoen' in next_line or
-                        next_line.startswith('--- PAGE') or
-                        'www.dsl-global.nl' in next_line or
-                        'The exporter of' in next_line or
-                        'Payment condition' in next_line):
+                    if _ARTICLE_EAN_RE.match(next_line) or _STOP_LINE_RE.search(next_line):
                         break
                     
                     # If this line doesn't contain price information, it's likely description continuation
-                    if not re.search(r'€\s*[\d.,]+', next_line):
+                    if not _EURO_AMOUNT_RE.search(next_line):
                         description += ' ' + next_line
                         j += 1
                     else:
                         break
                 
+                # Each cleanup step collapses whitespace with ' '.join(s.split()):
+                # the same result as re.sub(r'\s+', ' ', s).strip() (both use
+                # str.isspace), in one C-level pass
+                
                 # Clean up description to remove duplication with SKU
                 if article in description:
-                    description = description.replace(article, "").strip()
-                    # Remove extra spaces
-                    description = re.sub(r'\s+', ' ', description).strip()
+                    description = ' '.join(description.replace(article, "").split())
                 
                 # Special handling for "Per4m ISO 2kg" - remove the duplicate part
                 if article == "Per4m ISO 2kg" and "Per4m ISO 2kg" in description:
                     # Remove the duplicate "Per4m ISO 2kg" from the beginning of description
-                    description = description.replace("Per4m ISO 2kg", "").strip()
-                    # Remove extra spaces
-                    description = re.sub(r'\s+', ' ', description).strip()
+                    description = ' '.join(description.replace("Per4m ISO 2kg", "").split())
                 
                 # Clean up description to remove date patterns and other unwanted text
                 # Remove date patterns like "10 april 2025", "10 apr 2025", etc.
-                description = re.sub(r'\b\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4}\b', '', description, flags=re.IGNORECASE)
-                # Remove extra spaces after cleanup
-                description = re.sub(r'\s+', ' ', description).strip()
+                description = ' '.join(_DATE_WORDS_RE.sub('', description).split())
                 
                 # Add to order items if we have all required data
                 if quantity and unit_price and net_total:
@@ -231,16 +252,16 @@ def parse_dsl_invoice_text(text: str):
                 net_total = None
                 
                 while j < len(lines):
-                    next_line = lines[j].strip()
+                    next_line = lines[j]
                     
                     # Stop if we hit another product or boundary
-                    if (re.match(r'\d{13,}', next_line) or 
+                    if (_ARTICLE_EAN_RE.match(next_line) or 
                         'Total excluding VAT' in next_line or 
                         next_line.startswith('--- PAGE')):
                         break
                     
                     # Look for price information in next line
-                    qty_price_match = re.search(r'(\d+)\s+€\s*([\d.,]+)\s+0%\s+€\s*([\d.,]+)', next_line)
+                    qty_price_match = _QTY_PRICE_RE.search(next_line)
                     if qty_price_match:
                         quantity = qty_price_match.group(1)
                         unit_price = qty_price_match.group(2).replace(',', '.')
@@ -249,7 +270,7 @@ def parse_dsl_invoice_text(text: str):
                         break
                     
                     # Add to description if no price info
-                    if not re.search(r'€\s*[\d.,]+', next_line):
+                    if not _EURO_AMOUNT_RE.search(next_line):
                         description += ' ' + next_line
                     
                     j += 1
@@ -268,22 +289,22 @@ def parse_dsl_invoice_text(text: str):
                 continue
         
         # Handle shipping costs separately - don't add as line item
-        if in_table and ('Shipping costs' in line or 'shipping' in line.lower()):
+        if in_table and 'shipping' in lower:
             # Extract shipping cost and store in totals
             # Preferred format with explicit quantity/unit/total
-            qty_price_match = re.search(r'(\d+)\s+€\s*([\d.,]+)\s+0%\s+€\s*([\d.,]+)', line)
+            qty_price_match = _QTY_PRICE_RE.search(line)
             shipping_cost = None
             if qty_price_match:
                 shipping_cost = qty_price_match.group(3)
             else:
                 # Fallbacks:
                 # 1) Look for an explicit euro value after the last € on the line
-                euro_val_match = re.search(r'€\s*([\d\s.,]+)(?!.*€)', line)
+                euro_val_match = _LAST_EURO_VALUE_RE.search(line)
                 if euro_val_match:
                     shipping_cost = euro_val_match.group(1)
                 else:
                     # 2) Take the last numeric token on the line (supports 215 or 2.100,48)
-                    last_num_match = re.search(r'([0-9]{1,3}(?:[.,][0-9]{3})*(?:[.,][0-9]{2})?|[0-9]+)\s*$', line)
+                    last_num_match = _LAST_NUMBER_RE.search(line)
                     if last_num_match:
                         shipping_cost = last_num_match.group(1)
 
@@ -302,7 +323,7 @@ def parse_dsl_invoice_text(text: str):
         # Handle the special "Per4m ISO 2kg" line that has no article number
         # This is now handled by the general alphanumeric SKU logic above, but keep this as fallback
         if in_table and line.startswith('Per4m ISO 2kg') and not article_match:
-            qty_price_match = re.search(r'(\d+)\s+€\s*([\d.,]+)\s+0%\s+€\s*([\d.,]+)', line)
+            qty_price_match = _QTY_PRICE_RE.search(line)
             if qty_price_match:
                 quantity = qty_price_match.group(1)
                 unit_price = qty_price_match.group(2).replace(',', '.')
@@ -338,13 +359,13 @@ def parse_dsl_invoice_text(text: str):
             v = (val or '').strip()
             v = v.replace(' ', '')
             # Pattern: 1.234,56 or 1,234.56 or 215,00 or 215.00 or 215
-            m = re.match(r'^(\d{1,3}(?:[.,]\d{3})*)(?:[.,](\d{2}))?$', v)
+            m = _EURO_AMOUNT_PARTS_RE.match(v)
             if m:
-                whole = re.sub(r'[.,]', '', m.group(1))
+                whole = _SEPARATOR_RE.sub('', m.group(1))
                 cents = m.group(2) or '00'
                 return f"{int(whole)}.{cents}"
             # Fallback: digits only
-            if re.match(r'^\d+$', v):
+            if _ALL_DIGITS_RE.match(v):
                 # If the original string looked like it had cents (ends with 00 from formats), keep as integer euros
                 return f"{int(v)}.00"
             # Last resort: replace comma with dot and try float
@@ -353,15 +374,8 @@ def parse_dsl_invoice_text(text: str):
             except Exception:
                 return '0.00'
         # Look for "Shipping costs" followed by an amount on the same or next line
-        shipping_patterns = [
-            r"Shipping costs[^\n]*?€\s*([\d\s.,]+)",
-            r"Shipping costs[^\n]*?([\d\s.,]+)\s*€",
-            r"Shipping costs\s*\n\s*€\s*([\d\s.,]+)",
-            r"Shipping costs\s*\n\s*([\d\s.,]+)\s*€",
-            r"Shipping costs[^\n]*?([\d\s.,]+)\b"
-        ]
-        for pat in shipping_patterns:
-            m = re.search(pat, text, flags=re.IGNORECASE)
+        for pattern in _SHIPPING_RES:
+            m = pattern.search(text)
             if m:
                 val = m.group(1)
                 normalized = parse_euro_amount(val)
@@ -369,16 +383,16 @@ def parse_dsl_invoice_text(text: str):
                 break
 
     # Extract totals
-    total_match = re.search(r'Total excluding VAT\s+€\s*([\d.,]+)', text)
+    total_match = _TOTAL_EXCL_VAT_RE.search(text)
     if total_match:
         invoice_data['totals']['excl_vat'] = total_match.group(1).replace(',', '.')
     
-    total_match = re.search(r'Total te voldoen\s+€\s*([\d.,]+)', text)
+    total_match = _TOTAL_DUE_RE.search(text)
     if total_match:
         invoice_data['totals']['total'] = total_match.group(1).replace(',', '.')
     
     # Extract payment terms
-    payment_match = re.search(r'Payment condition:\s*(.+?)(?=\n|$)', text)
+    payment_match = _PAYMENT_TERMS_RE.search(text)
     if payment_match:
         invoice_data['metadata']['payment_terms'] = payment_match.group(1).strip()
 
@@ -4,19 +4,67 @@ import traceback
 from decimal import Decimal, InvalidOperation
 from pdfminer.high_level import extract_text
 from pdfminer.layout import LAParams
+import os
 import pdfplumber
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Format v1
+_HEADER_RE = re.compile(r"ODPOWIEDZIALNOŚCIĄ nr (FA/\d+/\d{2}/\d{4}/MAG)[\s\S]*?Date of issue: (\d{2}\.\d{2}\.\d{4})")
+_ITEMS_BLOCK_RE = re.compile(r"Gross value EUR\n(.*?)\nWay of payment", re.DOTALL)
+_ITEM_START_RE = re.compile(r"^\d+\s")  # Digit followed by space
+_ITEM_RE = re.compile(r"(\d+)\s+pcs\.\s+0\s+%\s+([\d,]+\,\d{2})\s+([\d\s,]+\,\d{2})")  # Quantity, unit price, total
+_ITEM_NUMBER_RE = re.compile(r"^\d+\s+(.*)")
+_PKWIU_RE = re.compile(r'\s+\d{2}\.\d{2}\.\d{2}\.\d')
+
+def _page_text(pdf_path, page_index):
+    """Worker entry point: one page's text. Module-level so it pickles; each
+    worker reopens the PDF itself"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return pdf.pages[page_index].extract_text()
+
+def _page_texts(pdf_path, workers=1):
+    """Text of every page, in order.
+
+    With workers > 1 the pages of a multi-page PDF are extracted in parallel
+    processes: pdfplumber's layout work is pure Python and holds the GIL.
+    Off by default, since on a single core the pool only adds its startup.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        n_pages = len(pdf.pages)
+        if workers <= 1 or n_pages < 2:
+            return [page.extract_text() for page in pdf.pages]
+    with ProcessPoolExecutor(max_workers=min(workers, n_pages)) as executor:
+        return list(executor.map(_page_text, repeat(pdf_path), range(n_pages)))
+
+# Page texts per (path, mtime, size), shared with the v2 parser. A hit needs the
+# same file extracted twice in one process, e.g. by tests or when trying v1 and
+# v2 on it; the backend's one-subprocess-per-PDF calls never get one. The
+# worker count is left out of the key: it does not change the text.
+_PAGE_TEXTS_CACHE_SIZE = 64
+_page_texts_cache = {}
+
+def _page_texts_cached(pdf_path, workers=1):
+    st = os.stat(pdf_path)
+    key = (pdf_path, st.st_mtime_ns, st.st_size)
+    texts = _page_texts_cache.get(key)
+    if texts is None:
+        if len(_page_texts_cache) >= _PAGE_TEXTS_CACHE_SIZE:
+            # Dicts keep insertion order: drop the oldest entry
+            del _page_texts_cache[next(iter(_page_texts_cache))]
+        texts = _page_texts_cache[key] = tuple(_page_texts(pdf_path, workers))
+    return texts
 
 class OstrovitInvoiceParser:
     def __init__(self):
         self.supplier_name = "Ostrovit"
         self.currency = "EUR"
 
-    def extract(self, pdf_path):
-        """Extracts invoice data from a PDF file."""
+    def extract(self, pdf_path, workers=1):
+        """Extracts invoice data from a PDF file (workers > 1: pages in parallel)."""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                raw_text = "\n".join(page.extract_text() for page in pdf.pages)
+            raw_text = "\n".join(_page_texts_cached(pdf_path, workers))
 
             # Try to extract data using format v1
             header_info = self._extract_header_info_v1(raw_text)
@@ -48,8 +96,7 @@ class OstrovitInvoiceParser:
 
     def _extract_header_info_v1(self, raw_text):
         """Extracts header information from the raw text of the PDF (format v1)."""
-        header_re = re.compile(r"ODPOWIEDZIALNOŚCIĄ nr (FA/\d+/\d{2}/\d{4}/MAG)[\s\S]*?Date of issue: (\d{2}\.\d{2}\.\d{4})")
-        header_match = header_re.search(raw_text)
+        header_match = _HEADER_RE.search(raw_text)
 
         if header_match:
             day, month, year = header_match.group(2).split('.')
@@ -64,7 +111,7 @@ class OstrovitInvoiceParser:
         """Extracts line items from the raw text of the PDF (format v1)."""
         line_items = []
         
-        line_items_block_match = re.search(r"Gross value EUR\n(.*?)\nWay of payment", raw_text, re.DOTALL)
+        line_items_block_match = _ITEMS_BLOCK_RE.search(raw_text)
         if not line_items_block_match:
             return []
 
@@ -75,7 +122,7 @@ class OstrovitInvoiceParser:
         current_item = []
 
         for line in lines:
-            if re.match(r"^\d+\s", line): # Match digit followed by space
+            if _ITEM_START_RE.match(line):
                 if current_item:
                     item_lines.append(" ".join(current_item))
                 current_item = [line]
@@ -87,7 +134,7 @@ class OstrovitInvoiceParser:
 
         for item_line in item_lines:
             # Regex to find quantity, unit price, and total price
-            match = re.search(r"(\d+)\s+pcs\.\s+0\s+%\s+([\d,]+\,\d{2})\s+([\d\s,]+\,\d{2})", item_line)
+            match = _ITEM_RE.search(item_line)
             if match:
                 quantity = int(match.group(1))
                 unit_price_str = match.group(2).replace(",", ".")
@@ -102,14 +149,14 @@ class OstrovitInvoiceParser:
                 full_description = (desc_part1 + " " + desc_part2).strip()
 
                 # remove the leading item number from description
-                desc_match = re.match(r"^\d+\s+(.*)", full_description)
+                desc_match = _ITEM_NUMBER_RE.match(full_description)
                 if desc_match:
                     description = desc_match.group(1).strip()
                 else:
                     description = full_description
 
                 # remove PKWiU code from description
-                description = re.sub(r'\s+\d{2}\.\d{2}\.\d{2}\.\d', '', description).strip()
+                description = _PKWIU_RE.sub('', description).strip()
 
 
                 line_items.append({
@@ -146,8 +193,9 @@ class OstrovitInvoiceParser:
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         pdf_path = sys.argv[1]
+        workers = (os.cpu_count() or 1) if '--parallel' in sys.argv else 1
         parser = OstrovitInvoiceParser()
-        data = parser.extract(pdf_path)
+        data = parser.extract(pdf_path, workers=workers)
         print(json.dumps(data, indent=4))
     else:
         print(json.dumps({"error": "No PDF path provided"}))
\ No newline at end of file
@@ -1,15 +1,39 @@
+import os
 import re
 from datetime import datetime
-import pdfplumber
+# Page text extraction (and its cache) is shared with the v1 parser. Relative
+# when imported as part of the python package, plain when run as a script.
+try:
+    from .invoice_extractor_ostrovit import _page_texts_cached
+except ImportError:
+    from invoice_extractor_ostrovit import _page_texts_cached
+
+_HEADER_RE = re.compile(
+    r"Invoice\s+(?P<invoice_number>FS/\d{4}/\d{2}/\d{5}).*?"
+    r"Sale Date:\s+Issue Date:.*?\n"
+    r".*?\s+(?P<sale_date>\d{2}\.\d{2}\.\d{4})\s+(?P<issue_date>\d{2}\.\d{2}\.\d{4})",
+    re.DOTALL
+)
+_ITEMS_BLOCK_RE = re.compile(r"GROSS\nVALUE VALUE\n(.*?)\nUntaxed Amount", re.DOTALL)
+_ITEM_SPLIT_RE = re.compile(r'\n(?=\d+\s+\[\d+\])')
+_SKU_RE = re.compile(r'^\d+\s+\[(?P<sku>\d+)\]')
+# quantity Units vat% unit_price discount net_value € total_price €
+_PRICE_RE = re.compile(
+    r'(?P<quantity>[\d.]+)\s+Units\s+(?P<vat>\d+)%\s+(?P<unit_price>[\d.]+)\s+(?P<discount>[\d.]+)\s+(?P<net_value>[\d,.]+)\s+€\s+(?P<total_price>[\d,.]+)\s+€'
+)
+_CODES_RE = re.compile(r'(\d{8,})\s+(\d{10,})')  # CN CODE (8+ digits) and EAN (10+ digits)
+_VARIANT_SUFFIX_RE = re.compile(r'\s+(crunchy|smooth)\)?$')
+_TRAILING_SPACE_RE = re.compile(r'\s+$')
 
 class OstrovitInvoiceParserV2:
     def __init__(self):
         self.supplier_name = "Ostrovit"
         self.currency = "EUR"
 
-    def extract(self, pdf_path: str) -> dict:
-        with pdfplumber.open(pdf_path) as pdf:
-            raw_text = "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
+    def extract(self, pdf_path: str, workers: int = 1) -> dict:
+        """Extracts invoice data (workers > 1: pages in parallel)"""
+        page_texts = _page_texts_cached(pdf_path, workers)
+        raw_text = "\n".join(text for text in page_texts if text)
 
         header_info = self._extract_header_info(raw_text)
         line_items = self._extract_line_items(raw_text)
@@ -26,13 +50,7 @@ class OstrovitInvoiceParserV2:
         return extracted_data
 
     def _extract_header_info(self, raw_text):
-        header_info_match = re.search(
-            r"Invoice\s+(?P<invoice_number>FS/\d{4}/\d{2}/\d{5}).*?"
-            r"Sale Date:\s+Issue Date:.*?\n"
-            r".*?\s+(?P<sale_date>\d{2}\.\d{2}\.\d{4})\s+(?P<issue_date>\d{2}\.\d{2}\.\d{4})",
-            raw_text,
-            re.DOTALL
-        )
+        header_info_match = _HEADER_RE.search(raw_text)
 
         if header_info_match:
             data = header_info_match.groupdict()
@@ -46,12 +64,12 @@ class OstrovitInvoiceParserV2:
 
     def _extract_line_items(self, raw_text):
         line_items = []
-        line_items_block_match = re.search(r"GROSS\nVALUE VALUE\n(.*?)\nUntaxed Amount", raw_text, re.DOTALL)
+        line_items_block_match = _ITEMS_BLOCK_RE.search(raw_text)
         if not line_items_block_match:
             return []
 
         items_text = line_items_block_match.group(1)
-        item_lines_text = re.split(r'\n(?=\d+\s+\[\d+\])', items_text.strip())
+        item_lines_text = _ITEM_SPLIT_RE.split(items_text.strip())
 
         for item_text in item_lines_text:
             item_text = item_text.replace('\n', ' ')
@@ -59,7 +77,7 @@ class OstrovitInvoiceParserV2:
             # First, try to extract the core components using a more flexible approach
             
             # Extract SKU first
-            sku_match = re.search(r'^\d+\s+\[(?P<sku>\d+)\]', item_text)
+            sku_match = _SKU_RE.search(item_text)
             if not sku_match:
                 continue
                 
@@ -67,10 +85,7 @@ class OstrovitInvoiceParserV2:
             
             # Find the price pattern at the end: quantity Units vat% unit_price discount net_value € total_price €
             # Use simpler pattern that works for all items
-            price_pattern = re.search(
-                r'(?P<quantity>[\d.]+)\s+Units\s+(?P<vat>\d+)%\s+(?P<unit_price>[\d.]+)\s+(?P<discount>[\d.]+)\s+(?P<net_value>[\d,.]+)\s+€\s+(?P<total_price>[\d,.]+)\s+€',
-                item_text
-            )
+            price_pattern = _PRICE_RE.search(item_text)
             
             if not price_pattern:
                 continue
@@ -83,7 +98,7 @@ class OstrovitInvoiceParserV2:
             middle_part = item_text[sku_end:price_start]
             
             # Look for CN CODE (8+ digits) and EAN (10+ digits)
-            codes_match = re.search(r'(\d{8,})\s+(\d{10,})', middle_part)
+            codes_match = _CODES_RE.search(middle_part)
             if not codes_match:
                 continue
                 
@@ -92,8 +107,8 @@ class OstrovitInvoiceParserV2:
             description = middle_part[:description_end].strip()
             
             # Clean up description
-            description = re.sub(r'\s+(crunchy|smooth)\)?$', ')', description)
-            description = re.sub(r'\s+$', '', description)  # Remove trailing spaces
+            description = _VARIANT_SUFFIX_RE.sub(')', description)
+            description = _TRAILING_SPACE_RE.sub('', description)  # Remove trailing spaces
             
             # Extract price data
             price_data = price_pattern.groupdict()
@@ -125,6 +140,7 @@ if __name__ == "__main__":
 
     if len(sys.argv) > 1:
         pdf_path = sys.argv[1]
+        workers = (os.cpu_count() or 1) if '--parallel' in sys.argv else 1
         parser = OstrovitInvoiceParserV2()
-        data = parser.extract(pdf_path)
+        data = parser.extract(pdf_path, workers=workers)
         print(json.dumps(data, indent=4))
\ No newline at end of file
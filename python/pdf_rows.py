@@ -0,0 +1,41 @@
+from operator import itemgetter
+
+from pdfminer.layout import LAParams, LTTextContainer
+
+# Sort key for (-y, x, text) tuples: top-to-bottom, then left-to-right
+_POSITION_KEY = itemgetter(0, 1)
+
+# Default line building, but no box ordering: page_text_rows re-sorts the lines
+# by position itself, so pdfminer's hierarchical box grouping is wasted work
+ROW_LAPARAMS = LAParams(boxes_flow=None)
+
+
+def page_text_rows(page_layout):
+    """
+    Page text rebuilt as rows: a row collects the text lines within 5pt of its
+    first line's y, in reading order. Each row ends with a space.
+    """
+    elements = []
+    for element in page_layout:
+        if isinstance(element, LTTextContainer):
+            for text_line in element:
+                if hasattr(text_line, 'get_text'):
+                    text = text_line.get_text().strip()
+                    if text:
+                        elements.append((-text_line.y0, text_line.x0, text))
+    # Plain tuples and a C key function instead of per-element dicts and a
+    # lambda; the sort is stable, so ties keep their document order
+    elements.sort(key=_POSITION_KEY)
+    rows = []
+    row = []
+    row_y = None
+    for neg_y, _, text in elements:
+        if row_y is None or abs(row_y - neg_y) > 5:
+            if row:
+                rows.append(' '.join(row) + ' ')
+            row = []
+            row_y = neg_y
+        row.append(text)
+    if row:
+        rows.append(' '.join(row) + ' ')
+    return '\n'.join(rows)
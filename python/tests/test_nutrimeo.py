@@ -0,0 +1,38 @@
+import pytest
+import sys
+import importlib.util
+from pathlib import Path
+
+# Add parent directory to path to import parsers
+PYTHON_DIR = Path(__file__).parent.parent
+sys.path.append(str(PYTHON_DIR))
+
+# The extractor file name has a hyphen, so it is loaded by path
+_spec = importlib.util.spec_from_file_location(
+    "invoice_extractor_nutrimeo", PYTHON_DIR / "invoice_extractor-nutrimeo.py")
+nutrimeo = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = nutrimeo
+_spec.loader.exec_module(nutrimeo)
+
+NUTRIMEO_DIR = PYTHON_DIR / "test_invoices" / "Nutrimeo"
+
+
+class TestNutrimeoParser:
+    # Shipping HT as printed on each invoice. Before the _MAX_SHIPPING_HT
+    # check, invoice2-4 read the 'Sous-total HT' instead (270.78, 125.94 and
+    # 231.89).
+    @pytest.mark.parametrize("pdf_name, shipping_ht, shipping_cost", [
+        ("invoice1.pdf", 17.44, 20.93),
+        ("invoice2.pdf", 16.59, 19.91),
+        ("invoice3.pdf", 13.51, 16.21),
+        ("invoice4.pdf", 15.55, 18.66),
+    ])
+    def test_shipping(self, pdf_name, shipping_ht, shipping_cost):
+        pdf_path = NUTRIMEO_DIR / pdf_name
+        if not pdf_path.exists():
+            pytest.skip(f"PDF file not found: {pdf_path}")
+
+        result = nutrimeo.NutrimeoInvoiceParser().extract(str(pdf_path))
+
+        assert result['shipping_ht'] == shipping_ht
+        assert result['shipping_cost'] == shipping_cost
@@ -0,0 +1,72 @@
+import pytest
+import sys
+import importlib.util
+from pathlib import Path
+
+# Add parent directory to path to import parsers
+PYTHON_DIR = Path(__file__).parent.parent
+sys.path.append(str(PYTHON_DIR))
+
+# The extractor file name has a hyphen, so it is loaded by path. It is
+# registered in sys.modules so the batch workers can pickle its functions.
+_spec = importlib.util.spec_from_file_location(
+    "invoice_extractor_pb_wholesale", PYTHON_DIR / "invoice_extractor-pb_wholesale.py")
+pb_wholesale = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = pb_wholesale
+_spec.loader.exec_module(pb_wholesale)
+
+PB_WHOLESALE_DIR = PYTHON_DIR / "test_invoices" / "Pb wholesale"
+PFMSO_00003025_PDF = PB_WHOLESALE_DIR / "Sales Order_PFMSO-00003025_2026.01.15_12.42.34 (1).PDF"
+SO_00041753_PDF = PB_WHOLESALE_DIR / "Sales Order_SO-00041753_2024.11.25_12.14.38.PDF"
+
+# (sku, quantity, unit_price, total) per line, in invoice order
+SO_00041753_ITEMS = [
+    ('PFM05055', 88, 39.99, 3519.12),
+    ('PFM01021', 36, 29.99, 1079.64),
+    ('PFM01017', 4, 29.99, 119.96),
+    ('PFM01014', 8, 29.99, 239.92),
+    ('PFM01006', 8, 29.99, 239.92),
+    ('PFM01025', 4, 29.99, 119.96),
+    ('PFM01001', 4, 29.99, 119.96),
+    ('PFM01027', 4, 29.99, 119.96),
+    ('PFM01039', 4, 29.99, 119.96),
+    ('PFM01035', 4, 29.99, 119.96),
+    ('PFM05051', 4, 39.99, 159.96),
+    ('PFM15005', 12, 9.99, 119.88),
+    ('PFM05060', 32, 39.99, 1279.68),
+    ('PFM05057', 20, 39.99, 799.8),
+    ('PFM14023', 12, 10.99, 131.88),
+    ('PFM14030', 12, 10.99, 131.88),
+    ('PFM14033', 12, 10.99, 131.88),
+    ('PFM14022', 52, 10.99, 571.48),
+    ('PFM05063', 4, 39.99, 159.96),
+    ('PFM01023', 4, 29.99, 113.96),  # discounted line, total as printed
+    ('PFM01020', 8, 29.99, 239.92),
+    ('PFM01019', 4, 29.99, 119.96),
+    ('PFM01002', 4, 29.99, 119.96),
+]
+
+
+class TestPbWholesaleParser:
+    def test_so_00041753_line_items(self):
+        if not SO_00041753_PDF.exists():
+            pytest.skip(f"PDF file not found: {SO_00041753_PDF}")
+
+        result = pb_wholesale.PbWholesaleInvoiceParser().extract(str(SO_00041753_PDF))
+
+        items = [(item['sku'], item['quantity'], item['unit_price'], item['total'])
+                 for item in result['line_items']]
+        assert items == SO_00041753_ITEMS
+        # The sub total printed on the order
+        assert result['sub_total'] == 9878.56
+
+    def test_pfmso_00003025_order_date_fallback(self):
+        if not PFMSO_00003025_PDF.exists():
+            pytest.skip(f"PDF file not found: {PFMSO_00003025_PDF}")
+
+        result = pb_wholesale.PbWholesaleInvoiceParser().extract(str(PFMSO_00003025_PDF))
+
+        # In the pdfminer text the date does not follow the SO number line, so
+        # it comes from the 'Order Date:' label fallback
+        assert result['invoice_number'] == 'SO-00003025'
+        assert result['invoice_date'] == '14/01/2026'